@@ -1,34 +1,62 @@
 # app/ai_helpers.py
+import asyncio
 import os
-from openai import OpenAI
+import threading
+import time
 
-# Ensure API key is available
-if os.getenv("OPENAI_API_KEY") is None:
-    raise ValueError("Missing OPENAI_API_KEY. Add it to your environment variables.")
+from app import metrics
+from app.cache import get_llm_cache, text_hash
+from app.openai_embeddings import is_retryable, retry_delay, run_coroutine
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+CHAT_MODEL = os.getenv("OPENAI_CHAT_MODEL", "gpt-4o-mini")
+# bump when a prompt template changes so cached answers are not reused
+PROMPT_VERSION = "1"
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
 
-def summarize_candidate(full_text):
-    prompt = f"""
+# The OpenAI client is created on first use so that importing this module
+# (and every Streamlit rerun) doesn't pay for it, and a missing key only
+# fails the AI features instead of the whole app.
+_client = None
+_client_lock = threading.Lock()
+
+
+def _check_api_key():
+    # Ensure API key is available
+    if os.getenv("OPENAI_API_KEY") is None:
+        raise ValueError("Missing OPENAI_API_KEY. Add it to your environment variables.")
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _check_api_key()
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+# -------------------------------
+# PROMPTS
+# -------------------------------
+def _summary_prompt(full_text):
+    return f"""
     Summarize this resume into 5 bullet points:
     - Key skills
     - Experience summary
     - Strengths
     - Weaknesses
     - Job-fit summary
-    
+
     Resume:
     {full_text}
     """
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return resp.choices[0].message.content
 
 
-def explain_match(jd, resume_text):
-    prompt = f"""
+def _explain_prompt(jd, resume_text):
+    return f"""
     Explain why this resume matches the job description.
     Provide 5 points:
     1) Skill match
@@ -43,8 +71,142 @@ def explain_match(jd, resume_text):
     Resume:
     {resume_text}
     """
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}]
+
+
+# -------------------------------
+# RESPONSE CACHE
+# -------------------------------
+# keyed on (model, prompt template version, task, resume hash[, JD hash])
+def _namespace(task):
+    return f"llm:{CHAT_MODEL}:{PROMPT_VERSION}:{task}"
+
+
+def _summary_key(full_text):
+    return text_hash(full_text)
+
+
+def _explain_key(jd, resume_text):
+    return f"{text_hash(resume_text)}:{text_hash(jd)}"
+
+
+def _cached(task, keys):
+    cache = get_llm_cache()
+    if cache is None:
+        return {}
+    found = {k: v.decode("utf-8") for k, v in cache.get_many(_namespace(task), keys).items()}
+    metrics.inc("llm_cache_hits_total", len(found), task=task)
+    metrics.inc("llm_cache_misses_total", len(keys) - len(found), task=task)
+    return found
+
+
+def _store(task, items):
+    cache = get_llm_cache()
+    if cache is not None and items:
+        cache.put_many(_namespace(task), [(k, v.encode("utf-8")) for k, v in items])
+
+
+def _complete(prompt):
+    with metrics.span("llm.complete", model=CHAT_MODEL):
+        resp = get_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return resp.choices[0].message.content
+
+
+def _cached_complete(task, key, prompt):
+    hit = _cached(task, [key]).get(key)
+    if hit is not None:
+        return hit
+    answer = _complete(prompt)
+    _store(task, [(key, answer)])
+    return answer
+
+
+# -------------------------------
+# SINGLE CANDIDATE
+# -------------------------------
+def summarize_candidate(full_text):
+    return _cached_complete("summary", _summary_key(full_text), _summary_prompt(full_text))
+
+
+def explain_match(jd, resume_text):
+    return _cached_complete("explain", _explain_key(jd, resume_text), _explain_prompt(jd, resume_text))
+
+
+# -------------------------------
+# BATCH (concurrent)
+# -------------------------------
+async def _complete_async(client, semaphore, prompt):
+    # spans nest per thread, so the interleaved requests are timed directly
+    attempt = 0
+    while True:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                resp = await client.chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+                metrics.observe("llm_request_seconds", time.perf_counter() - start, model=CHAT_MODEL)
+                return resp.choices[0].message.content
+            except Exception as e:
+                metrics.inc("llm_request_errors_total", model=CHAT_MODEL)
+                if attempt >= LLM_MAX_RETRIES or not is_retryable(e):
+                    raise
+                delay = retry_delay(e, attempt)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def _complete_many(prompts, concurrency):
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    semaphore = asyncio.Semaphore(concurrency or LLM_CONCURRENCY)
+    try:
+        return await asyncio.gather(
+            *[_complete_async(client, semaphore, p) for p in prompts], return_exceptions=True
+        )
+    finally:
+        await client.close()
+
+
+def _batch(task, keys, prompts, concurrency):
+    # cached answers are returned as-is; the rest are requested concurrently.
+    # A failed request yields an error message for that item only (not cached).
+    answers = _cached(task, keys)
+    todo = [i for i, k in enumerate(keys) if k not in answers]
+    if todo:
+        _check_api_key()
+        unique = list(dict.fromkeys(keys[i] for i in todo))
+        prompt_of = {keys[i]: prompts[i] for i in todo}
+        with metrics.span("llm.batch", task=task, requests=len(unique)):
+            results = run_coroutine(_complete_many([prompt_of[k] for k in unique], concurrency))
+        fresh = []
+        for k, r in zip(unique, results):
+            if isinstance(r, Exception):
+                answers[k] = f"AI request failed: {r}"
+            else:
+                answers[k] = r
+                fresh.append((k, r))
+        _store(task, fresh)
+    return [answers[k] for k in keys]
+
+
+def summarize_candidates(full_texts, concurrency=None):
+    return _batch(
+        "summary",
+        [_summary_key(t) for t in full_texts],
+        [_summary_prompt(t) for t in full_texts],
+        concurrency,
+    )
+
+
+def explain_matches(jd, resume_texts, concurrency=None):
+    return _batch(
+        "explain",
+        [_explain_key(jd, t) for t in resume_texts],
+        [_explain_prompt(jd, t) for t in resume_texts],
+        concurrency,
     )
-    return resp.choices[0].message.content
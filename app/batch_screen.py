@@ -0,0 +1,153 @@
+# app/batch_screen.py
+#
+# Screen many job descriptions against the resume index in one go.
+#
+#   python -m app.batch_screen jds.jsonl -o results.csv -k 10
+#
+# Input is JSONL ({"id", "text", "skills", "years"} per line) or CSV with the
+# same columns; skills may be a list or a comma-separated string. Output is
+# CSV, JSONL, XLSX or Parquet (by extension, see app.exporter), streamed one
+# row per (JD, rank).
+
+import argparse
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.embedder import embed_texts
+from app.exporter import write_results
+from app.filters import ResumeFilter
+from app.search import search_batch
+from app.skills import canonical_skills
+
+RESULT_FIELDS = [
+    "jd_id", "rank", "file", "composite", "embed", "bm25", "skill_score", "exp_score", "years_experience"
+]
+
+
+# -------------------------------
+# INPUT
+# -------------------------------
+def _parse_skills(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return canonical_skills(value)
+
+
+def _normalize_jd(raw, line_no):
+    text = raw.get("text") or raw.get("jd") or ""
+    return {
+        "id": str(raw.get("id") or line_no),
+        "text": text,
+        "skills": _parse_skills(raw.get("skills")),
+        "years": float(raw.get("years") or 0),
+    }
+
+
+def read_jds(path):
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for line_no, raw in enumerate(rows, 1):
+            jd = _normalize_jd(raw, line_no)
+            if jd["text"].strip():
+                yield jd
+
+
+# -------------------------------
+# SCREENING
+# -------------------------------
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def screen_jds(jds, k=10, batch_size=256, **search_kw):
+    # yields (jd, results) in input order; each chunk of JDs is embedded
+    # in one call and searched with one index.search over the query matrix
+    for chunk in _chunks(jds, batch_size):
+        embeddings = embed_texts([jd["text"] for jd in chunk])
+        results = search_batch(
+            embeddings, k=k,
+            query_skills=[jd["skills"] for jd in chunk],
+            query_years=[jd["years"] for jd in chunk],
+            query_texts=[jd["text"] for jd in chunk],
+            **search_kw
+        )
+        yield from zip(chunk, results)
+
+
+def result_rows(screened):
+    for jd, results in screened:
+        for rank, r in enumerate(results, 1):
+            yield {
+                "jd_id": jd["id"],
+                "rank": rank,
+                "file": r["file"],
+                "composite": r["composite_score"],
+                "embed": r["embed_score"],
+                "bm25": r.get("bm25_score"),
+                "skill_score": r["skill_score"],
+                "exp_score": r["exp_score"],
+                "years_experience": r["years_experience"],
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a file of job descriptions against the resume index.")
+    parser.add_argument("jds", help="JSONL or CSV file with id, text, skills, years")
+    parser.add_argument("-o", "--out", default="screening_results.csv", help=".csv, .jsonl, .xlsx or .parquet output")
+    parser.add_argument("-k", type=int, default=10, help="candidates per JD")
+    parser.add_argument("--batch-size", type=int, default=256, help="JDs embedded/searched per batch")
+    parser.add_argument("--nprobe", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--require-skills", default="", help="comma-separated skills every candidate must have")
+    parser.add_argument("--min-years", type=float, default=None, help="hard minimum years of experience")
+    parser.add_argument("--max-years", type=float, default=None, help="hard maximum years of experience")
+    parser.add_argument("--file-types", default="", help="comma-separated, e.g. pdf,docx")
+    parser.add_argument("--fusion", choices=["rrf", "weighted"], default=None,
+                        help="BM25 + dense fusion (default HYBRID_FUSION)")
+    args = parser.parse_args(argv)
+
+    filters = ResumeFilter(
+        required_skills=_parse_skills(args.require_skills),
+        min_years=args.min_years,
+        max_years=args.max_years,
+        file_types=_parse_skills(args.file_types),
+    )
+
+    n_jds = 0
+
+    def counting(jds):
+        nonlocal n_jds
+        for jd in jds:
+            n_jds += 1
+            yield jd
+
+    start = time.perf_counter()
+    screened = screen_jds(counting(read_jds(args.jds)), k=args.k, batch_size=args.batch_size,
+                          nprobe=args.nprobe, ef_search=args.ef_search, filters=filters,
+                          fusion=args.fusion)
+    n_rows = write_results(result_rows(screened), args.out, fields=RESULT_FIELDS)
+    elapsed = time.perf_counter() - start
+
+    rate = n_jds / elapsed if elapsed > 0 else float("inf")
+    print(f"Screened {n_jds} JDs -> {n_rows} rows in {elapsed:.2f}s ({rate:.1f} JDs/s); wrote {args.out}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
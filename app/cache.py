@@ -0,0 +1,173 @@
+# app/cache.py
+#
+# Small persistent key/value cache on SQLite with size-bounded LRU eviction.
+# Keys are (namespace, key) pairs; values are bytes. The size is checked
+# every max_entries / EVICT_CHECK_DIVISOR inserts rather than on every put
+# (COUNT(*) scans the table), so the cache can run that far over its bound.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "500000"))
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "100000"))
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+# SQLite caps the number of bound parameters per statement
+_SQL_BATCH = 500
+EVICT_CHECK_DIVISOR = 100
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    def __init__(self, path, max_entries):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._evict_every = max(1, max_entries // EVICT_CHECK_DIVISOR)
+        self._puts_since_evict = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " last_used REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_lru ON cache (last_used)")
+
+    def get_many(self, namespace, keys):
+        # returns {key: value} for the keys present, and marks them used
+        found = {}
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(keys), _SQL_BATCH):
+                chunk = keys[i:i + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE namespace = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [namespace, *chunk],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE cache SET last_used = ? WHERE namespace = ? AND key = ?",
+                        [(now, namespace, k) for k in found],
+                    )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, namespace, key):
+        return self.get_many(namespace, [key]).get(key)
+
+    def put_many(self, namespace, items):
+        # items: iterable of (key, bytes)
+        now = time.time()
+        rows = [(namespace, k, v, now) for k, v in items]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, last_used) VALUES (?, ?, ?, ?)", rows,
+            )
+            self._puts_since_evict += len(rows)
+            if self._puts_since_evict >= self._evict_every:
+                self._puts_since_evict = 0
+                self._evict()
+
+    def put(self, namespace, key, value):
+        self.put_many(namespace, [(key, value)])
+
+    def _evict(self):
+        excess = self._count() - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": self._count()}
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+
+# -------------------------------
+# EMBEDDINGS
+# -------------------------------
+class EmbeddingCache:
+    # float32 vectors keyed on (embed mode, model name, text hash)
+    def __init__(self, store: SQLiteCache):
+        self.store = store
+
+    @staticmethod
+    def namespace(mode, model):
+        return f"embed:{mode}:{model}"
+
+    def lookup(self, mode, model, texts):
+        # returns {position in texts: vector} for cached texts
+        hashes = [text_hash(t) for t in texts]
+        found = self.store.get_many(self.namespace(mode, model), hashes)
+        return {i: np.frombuffer(found[h], dtype="float32") for i, h in enumerate(hashes) if h in found}
+
+    def store_vectors(self, mode, model, texts, vectors):
+        self.store.put_many(
+            self.namespace(mode, model),
+            [(text_hash(t), np.asarray(v, dtype="float32").tobytes()) for t, v in zip(texts, vectors)],
+        )
+
+    def stats(self):
+        return self.store.stats()
+
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    # None when disabled via EMBED_CACHE=0
+    global _embedding_cache
+    if not EMBED_CACHE_ENABLED:
+        return None
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(SQLiteCache(EMBED_CACHE_PATH, EMBED_CACHE_MAX_ENTRIES))
+        return _embedding_cache
+
+
+# -------------------------------
+# LLM RESPONSES
+# -------------------------------
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    # None when disabled via LLM_CACHE=0
+    global _llm_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = SQLiteCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES)
+        return _llm_cache
@@ -0,0 +1,112 @@
+# app/chat_context.py
+#
+# Context for the recruiter chatbot. Each shortlisted resume is split into
+# overlapping line-aligned chunks that are embedded once per shortlist; for
+# every question only the most relevant chunks are packed into the prompt,
+# up to a token budget.
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.cache import text_hash
+from app.chunking import chunk_text
+from app.embedder import embed_texts
+from app.openai_embeddings import count_tokens
+
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "3000"))
+CHUNK_CHARS = int(os.getenv("CHAT_CHUNK_CHARS", "800"))
+CHUNK_OVERLAP = int(os.getenv("CHAT_CHUNK_OVERLAP", "150"))
+_SHORTLIST_CACHE_SIZE = 16
+
+
+# -------------------------------
+# SHORTLIST CONTEXT
+# -------------------------------
+def _candidate_header(r):
+    return (f"Candidate: {r['file']}\n"
+            f"Skills: {', '.join(r.get('skills', []))}\n"
+            f"Experience: {r.get('years_experience', 0)} yrs")
+
+
+class ShortlistContext:
+    def __init__(self, results):
+        self.headers = [_candidate_header(r) for r in results]
+        self.chunks = []  # (candidate index, text, tokens)
+        for i, r in enumerate(results):
+            for c in chunk_text(r.get("full_text", ""), CHUNK_CHARS, CHUNK_OVERLAP):
+                self.chunks.append((i, c, count_tokens(c)))
+
+        if self.chunks:
+            vectors = embed_texts([c for _, c, _ in self.chunks])  # normalized
+        else:
+            vectors = np.zeros((0, 1), dtype="float32")
+        self.vectors = vectors
+
+    def select(self, question, budget=None):
+        # chunk indices to include: every candidate's best chunk first (so
+        # nobody is dropped), then the remaining chunks by relevance
+        budget = budget or CHAT_CONTEXT_TOKENS
+        used = sum(count_tokens(h) for h in self.headers)
+        if not self.chunks:
+            return []
+
+        q = embed_texts([question])[0]
+        order = np.argsort(-(self.vectors @ q), kind="stable")
+
+        best = {}
+        for j in order:
+            best.setdefault(self.chunks[j][0], j)
+        firsts = set(best.values())
+        ranked = list(best.values()) + [j for j in order if j not in firsts]
+
+        chosen = []
+        for j in ranked:
+            tokens = self.chunks[j][2]
+            if used + tokens > budget:
+                continue
+            chosen.append(j)
+            used += tokens
+        return chosen
+
+    def build(self, question, budget=None):
+        chosen = sorted(self.select(question, budget))  # document order
+        parts = []
+        for i, header in enumerate(self.headers):
+            excerpts = [self.chunks[j][1] for j in chosen if self.chunks[j][0] == i]
+            parts.append(header + "\nRelevant excerpts:\n" + ("\n...\n".join(excerpts) or "(none)"))
+        return "\n\n".join(parts)
+
+
+_shortlists = OrderedDict()
+_shortlists_lock = threading.Lock()
+
+
+def get_shortlist_context(results):
+    # chunk embeddings are computed once per shortlist and reused for
+    # follow-up questions
+    key = tuple((r["file"], text_hash(r.get("full_text", ""))) for r in results)
+    with _shortlists_lock:
+        ctx = _shortlists.get(key)
+        if ctx is not None:
+            _shortlists.move_to_end(key)
+            return ctx
+    ctx = ShortlistContext(results)
+    with _shortlists_lock:
+        _shortlists[key] = ctx
+        while len(_shortlists) > _SHORTLIST_CACHE_SIZE:
+            _shortlists.popitem(last=False)
+    return ctx
+
+
+def build_chat_prompt(question, results, budget=None):
+    context = get_shortlist_context(results).build(question, budget)
+    return f"""
+You are a recruiter assistant. Use ONLY the information from these resumes:
+
+{context}
+
+Question: {question}
+"""
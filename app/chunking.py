@@ -0,0 +1,99 @@
+# app/chunking.py
+#
+# Chunk-level resume embeddings. With INDEX_GRANULARITY=chunk every resume
+# is indexed as several vectors: its search text (skills + experience +
+# education) plus overlapping line-aligned chunks of the full text, so long
+# histories are not lost to the embedding model's input truncation.
+#
+# Vector ids encode the resume: vector id = resume id * CHUNK_STRIDE + chunk
+# number. At query time chunk hits are folded back into one score per resume
+# (best chunk, or the mean of its best CHUNK_AGG_TOP_N chunks).
+
+import os
+
+import numpy as np
+
+INDEX_GRANULARITY = os.getenv("INDEX_GRANULARITY", "resume")  # "resume" or "chunk"
+GRANULARITIES = ("resume", "chunk")
+CHUNK_STRIDE = 1024
+MAX_CHUNKS = min(int(os.getenv("INDEX_MAX_CHUNKS", "64")), CHUNK_STRIDE)
+# all-MiniLM-L6-v2 reads ~256 word pieces, roughly 1000 characters
+INDEX_CHUNK_CHARS = int(os.getenv("INDEX_CHUNK_CHARS", "800"))
+INDEX_CHUNK_OVERLAP = int(os.getenv("INDEX_CHUNK_OVERLAP", "150"))
+CHUNK_AGG = os.getenv("CHUNK_AGG", "max")  # "max" or "mean"
+CHUNK_AGG_TOP_N = int(os.getenv("CHUNK_AGG_TOP_N", "3"))
+# chunk hits fetched per resume wanted in the re-ranking pool
+CHUNK_OVERSAMPLE = int(os.getenv("CHUNK_OVERSAMPLE", "4"))
+
+
+# -------------------------------
+# TEXT
+# -------------------------------
+def chunk_text(text, max_chars=INDEX_CHUNK_CHARS, overlap=INDEX_CHUNK_OVERLAP):
+    # pack whole lines into chunks of ~max_chars; each chunk repeats the
+    # trailing ~overlap chars (whole lines) of the previous one
+    chunks = []
+    current, size = [], 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        # overlong lines are hard-split
+        pieces = [line[i:i + max_chars] for i in range(0, len(line), max_chars)]
+        for piece in pieces:
+            if current and size + len(piece) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                carry, carried = [], 0
+                for prev in reversed(current):
+                    if carried + len(prev) > overlap:
+                        break
+                    carry.insert(0, prev)
+                    carried += len(prev) + 1
+                current, size = carry, carried
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def resume_chunks(search_text, full_text):
+    # the search text first, then the full text; at most MAX_CHUNKS
+    chunks = [search_text] if search_text else []
+    chunks.extend(chunk_text(full_text))
+    return chunks[:MAX_CHUNKS] or [full_text[:INDEX_CHUNK_CHARS] or " "]
+
+
+# -------------------------------
+# IDS
+# -------------------------------
+def chunk_ids(resume_ids, counts, stride=CHUNK_STRIDE):
+    # vector ids of all chunks of the given resumes
+    resume_ids = np.asarray(resume_ids, dtype="int64")
+    counts = np.asarray(counts, dtype="int64")
+    owner = np.repeat(resume_ids, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner * stride + offsets
+
+
+# -------------------------------
+# AGGREGATION
+# -------------------------------
+def aggregate(scores, ids, stride, top_n=1):
+    # one query's chunk hits (scores descending, -1 = no hit) -> (resume
+    # scores, resume ids), best first. top_n=1 is max-sim; otherwise the mean
+    # of each resume's best top_n chunks among the hits.
+    valid = ids >= 0
+    scores, owners = scores[valid], ids[valid] // stride
+    if not len(owners):
+        return scores, owners
+
+    order = np.argsort(owners, kind="stable")  # keeps score order per resume
+    owners, scores = owners[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(owners)]))
+    keep = np.arange(len(owners)) - starts[group] < max(1, top_n)
+
+    agg = np.bincount(group[keep], scores[keep]) / np.bincount(group[keep])
+    best = np.argsort(-agg, kind="stable")
+    return agg[best].astype("float32"), owners[starts][best]
@@ -1,20 +1,192 @@
 # app/embedder.py
 import os
+import re
+import threading
+import zlib
+from pathlib import Path
 from typing import List
 
-MODE = os.getenv("EMBED_MODE", "local")  # set EMBED_MODE=openai to use OpenAI
+import numpy as np
 
+from app import metrics
+from app.cache import get_embedding_cache
+
+# set EMBED_MODE=openai to use OpenAI; EMBED_MODE=hash is an offline stub
+# (hashed bag of words) for tests and benchmarks
+MODE = os.getenv("EMBED_MODE", "local")
+HASH_DIM = 384
 if MODE == "openai":
-    import openai
-    openai.api_key = os.getenv("OPENAI_API_KEY")
+    from app import openai_embeddings
+    # includes the requested dimensions, so cached vectors never mix sizes
+    MODEL_NAME = f"{openai_embeddings.MODEL}@{openai_embeddings.DIMENSIONS}"
+elif MODE == "hash":
+    MODEL_NAME = f"hash@{HASH_DIM}"
+else:
+    MODEL_NAME = "all-MiniLM-L6-v2"  # 384-dim model
 
-    def embed_texts(texts: List[str]) -> List[List[float]]:
-        res = openai.Embedding.create(model="text-embedding-3-small", input=texts)
-        return [r["embedding"] for r in res["data"]]
+# texts per model / API call in embed_array
+EMBED_ENCODE_BATCH = int(os.getenv("EMBED_ENCODE_BATCH", "256"))
+
+# The sentence-transformers model is loaded on first use (or by warm_up), not
+# at import, so importing this module is cheap.
+_model = None
+_model_lock = threading.Lock()
+_warm_thread = None
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME)
+    return _model
+
+
+def warm_up(background=True):
+    # start loading the model now, e.g. while the UI renders
+    global _warm_thread
+    if MODE != "local" or _model is not None:
+        return
+    if not background:
+        get_model()
+        return
+    with _model_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=get_model, name="embedder-warm-up", daemon=True)
+            _warm_thread.start()
+
+
+def _normalize(vectors):
+    # L2-normalize rows in place
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    vectors /= norms
+    return vectors
+
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash_embed(texts):
+    # deterministic across processes (crc32, not the salted built-in hash)
+    out = np.zeros((len(texts), HASH_DIM), dtype="float32")
+    for i, text in enumerate(texts):
+        for word in _WORD_RE.findall(text.lower()):
+            out[i, zlib.crc32(word.encode("utf-8")) % HASH_DIM] += 1.0
+    out[~out.any(axis=1), 0] = 1.0  # empty text -> a fixed unit vector
+    return _normalize(out)
+
+
+def _embed_uncached(texts: List[str]) -> np.ndarray:
+    # (n, dim) float32, rows L2-normalized
+    if not texts:
+        return np.zeros((0, 0), dtype="float32")
+    with metrics.span("embed.model", mode=MODE, items=len(texts)):
+        if MODE == "openai":
+            return _normalize(np.asarray(openai_embeddings.embed(texts), dtype="float32"))
+        if MODE == "hash":
+            return _hash_embed(texts)
+
+        vectors = get_model().encode(texts, show_progress_bar=False, convert_to_numpy=True,
+                                     normalize_embeddings=True)
+        return np.asarray(vectors, dtype="float32")
+
+
+# Texts already embedded with the same mode + model come from the on-disk
+# cache (see app.cache); only the misses reach the model / API. Returns an
+# (n, dim) float32 matrix of normalized vectors.
+def embed_texts(texts: List[str]) -> np.ndarray:
+    with metrics.span("embed", items=len(texts)):
+        return _embed_cached(texts)
+
+
+def _embed_cached(texts):
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return _embed_uncached(texts)
+
+    found = cache.lookup(MODE, MODEL_NAME, texts)
+    missing = [i for i in range(len(texts)) if i not in found]
+    metrics.inc("embed_cache_hits_total", len(texts) - len(missing))
+    metrics.inc("embed_cache_misses_total", len(missing))
+    if missing:
+        # embed each distinct missing text once
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        vectors = _embed_uncached(unique)
+        cache.store_vectors(MODE, MODEL_NAME, unique, vectors)
+        by_text = dict(zip(unique, vectors))
+        for i in missing:
+            found[i] = by_text[texts[i]]
+
+    return np.stack([found[i] for i in range(len(texts))]).astype("float32", copy=False)
+
+
+# -------------------------------
+# ARRAY OUTPUT
+# -------------------------------
+class VectorBuffer:
+    # Append-only (n, dim) float32 matrix. Storage is preallocated for
+    # `capacity` rows (the width comes from the first append) and grows
+    # geometrically if more arrive. With a path it is a memory-mapped file,
+    # so a large build keeps its vectors out of RAM.
+    def __init__(self, capacity, path=None):
+        self.capacity = max(1, capacity)
+        self.path = Path(path) if path else None
+        self.rows = 0
+        self._data = None
+
+    def _allocate(self, capacity, dim):
+        if self.path is None:
+            data = np.empty((capacity, dim), dtype="float32")
+            if self._data is not None:
+                data[:self.rows] = self._data[:self.rows]
+        else:
+            # extend the file in place; the rows written so far stay put
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self._data is not None:
+                self._data.flush()
+            with open(self.path, "r+b" if self._data is not None else "wb") as f:
+                f.truncate(capacity * dim * 4)
+            data = np.memmap(self.path, dtype="float32", mode="r+", shape=(capacity, dim))
+        self._data, self.capacity = data, capacity
+
+    def append(self, vectors):
+        vectors = np.asarray(vectors, dtype="float32")
+        if not len(vectors):
+            return
+        if self._data is None:
+            self._allocate(max(self.capacity, len(vectors)), vectors.shape[1])
+        elif self.rows + len(vectors) > self.capacity:
+            self._allocate(max(self.capacity * 2, self.rows + len(vectors)), self._data.shape[1])
+        self._data[self.rows:self.rows + len(vectors)] = vectors
+        self.rows += len(vectors)
+
+    @property
+    def array(self):
+        # view of the rows written so far (no copy)
+        if self._data is None:
+            return np.zeros((0, 0), dtype="float32")
+        return self._data[:self.rows]
+
+    def close(self):
+        # drop the mapping and its file
+        self._data = None
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+def embed_array(texts: List[str], batch_size=None, path=None) -> np.ndarray:
+    # embed_texts in batches of EMBED_ENCODE_BATCH, written straight into one
+    # preallocated float32 matrix (memory-mapped at `path` if given)
+    batch_size = batch_size or EMBED_ENCODE_BATCH
+    buffer = VectorBuffer(len(texts), path)
+    for start in range(0, len(texts), batch_size):
+        buffer.append(embed_texts(texts[start:start + batch_size]))
+    return buffer.array
 
-else:
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer('all-MiniLM-L6-v2')  # 384-dim model
 
-    def embed_texts(texts: List[str]) -> List[List[float]]:
-        return model.encode(texts, show_progress_bar=False).tolist()
+def embedding_cache_stats():
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else None
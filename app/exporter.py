@@ -1,18 +1,187 @@
-import openpyxl
-from openpyxl.styles import Font
-import pandas as pd
+# app/exporter.py
+#
+# Streaming export of screening results. Rows (dicts) are consumed from an
+# iterator and written in one pass, so a batch run with hundreds of
+# thousands of rows never has them all in memory:
+#
+#   csv      csv.DictWriter
+#   jsonl    one JSON object per line
+#   xlsx     openpyxl write-only workbook (bold header, frozen first row)
+#   parquet  pyarrow, PARQUET_BATCH_ROWS rows per row group (pip install pyarrow)
+#
+# write_results writes to a private temp file next to the target and renames
+# it into place, so concurrent exports never see each other's half-written
+# output; export_bytes builds the file in memory (Streamlit downloads).
 
-def export_excel(results):
-    df = pd.DataFrame(results)
+import csv
+import io
+import itertools
+import json
+import os
+import tempfile
+from pathlib import Path
+
+EXPORT_FORMATS = ("csv", "jsonl", "xlsx", "parquet")
+BINARY_FORMATS = ("xlsx", "parquet")
+PARQUET_BATCH_ROWS = int(os.getenv("PARQUET_BATCH_ROWS", "65536"))
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Parquet column types of the screening-row fields; any other field is
+# float64 (scores, years). The schema is fixed up front so that every row
+# group has the same types whatever values the first one happens to hold.
+PARQUET_TYPES = {"jd_id": "string", "file": "string", "rank": "int64"}
+
+
+def _fields_and_rows(rows, fields):
+    # without explicit fields the first row's keys are used
+    rows = iter(rows)
+    if fields is not None:
+        return list(fields), rows
+    first = next(rows, None)
+    if first is None:
+        return [], rows
+    return list(first), itertools.chain([first], rows)
+
+
+# -------------------------------
+# WRITERS (file object in, row count out)
+# -------------------------------
+def write_csv(rows, f, fields=None):
+    fields, rows = _fields_and_rows(rows, fields)
+    writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_jsonl(rows, f, fields=None):
+    count = 0
+    for row in rows:
+        if fields is not None:
+            row = {k: row.get(k) for k in fields}
+        f.write(json.dumps(row) + "\n")
+        count += 1
+    return count
+
+
+def write_xlsx(rows, f, fields=None, sheet_title="Screening Results"):
+    # write-only mode streams rows to the zip instead of keeping a cell grid
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    fields, rows = _fields_and_rows(rows, fields)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_title)
+    ws.freeze_panes = "A2"
+    for i, name in enumerate(fields):
+        ws.column_dimensions[_column_letter(i)].width = max(10, len(name) + 2)
+
+    bold = Font(bold=True)
+    header = []
+    for name in fields:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.font = bold
+        header.append(cell)
+    ws.append(header)
+
+    count = 0
+    for row in rows:
+        ws.append([row.get(k) for k in fields])
+        count += 1
+    wb.save(f)
+    return count
+
+
+def _column_letter(i):
+    from openpyxl.utils import get_column_letter
+    return get_column_letter(i + 1)
 
-    filename = "screening_results.xlsx"
-    df.to_excel(filename, index=False)
 
-    wb = openpyxl.load_workbook(filename)
-    ws = wb.active
+def parquet_schema(fields, types=None):
+    import pyarrow as pa
 
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
+    types = {**PARQUET_TYPES, **(types or {})}
+    return pa.schema([(k, pa.type_for_alias(types.get(k, "float64"))) for k in fields])
 
-    wb.save(filename)
-    return filename
+
+def write_parquet(rows, f, fields=None, batch_rows=PARQUET_BATCH_ROWS, types=None):
+    # types: {field: Arrow type name} on top of PARQUET_TYPES
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields, rows = _fields_and_rows(rows, fields)
+    schema = parquet_schema(fields, types)
+    count = 0
+    with pq.ParquetWriter(f, schema) as writer:
+        while True:
+            batch = list(itertools.islice(rows, batch_rows))
+            if not batch:
+                break
+            # safe casts: a value that does not fit its column (2.5 as rank)
+            # raises instead of being truncated
+            columns = [pa.array([row.get(fd.name) for row in batch]).cast(fd.type) for fd in schema]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            count += len(batch)
+    return count
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "xlsx": write_xlsx, "parquet": write_parquet}
+
+
+# -------------------------------
+# ENTRY POINTS
+# -------------------------------
+def export_format(path):
+    fmt = Path(path).suffix.lower().lstrip(".")
+    fmt = {"json": "jsonl", "xls": "xlsx", "pq": "parquet"}.get(fmt, fmt)
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    return fmt
+
+
+def _open(f, fmt):
+    if fmt in BINARY_FORMATS:
+        return f
+    return io.TextIOWrapper(f, encoding="utf-8", newline="")
+
+
+def write_results(rows, out, fields=None, fmt=None):
+    # stream rows to `out` (format from the extension unless fmt is given);
+    # returns the number of rows written
+    out = Path(out)
+    fmt = fmt or export_format(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{out.name}.", suffix=".tmp", dir=out.parent)
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            f = _open(raw, fmt)
+            count = WRITERS[fmt](rows, f, fields)
+            f.flush()
+            if f is not raw:
+                f.detach()
+        os.chmod(tmp, 0o644)  # mkstemp creates it 0600
+        os.replace(tmp, out)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return count
+
+
+def export_bytes(rows, fmt="xlsx", fields=None):
+    # the whole file as bytes, for a download button
+    buf = io.BytesIO()
+    f = _open(buf, fmt)
+    WRITERS[fmt](rows, f, fields)
+    f.flush()
+    if f is not buf:
+        f.detach()
+    return buf.getvalue()
+
+
+def export_excel(results):
+    # formatted XLSX of the screening rows, built in memory per request
+    return export_bytes(results, "xlsx")
@@ -0,0 +1,125 @@
+# app/fake_openai.py
+#
+# Minimal local stand-in for the OpenAI API, for offline runs and tests:
+#
+#   python -m app.fake_openai --port 8900 [--rate-limit-every 5] [--latency 0.05]
+#   export OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=test
+#
+# POST /v1/embeddings        deterministic hashed bag-of-words vectors
+# POST /v1/chat/completions  echoes a short digest of the prompt
+#
+# --rate-limit-every N answers every Nth request with 429 + Retry-After.
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_DIMENSIONS = 1536
+
+
+def fake_embedding(text, dim):
+    vec = [0.0] * dim
+    for word in text.lower().split():
+        h = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:8], "little")
+        vec[h % dim] += 1.0 if (h >> 63) == 0 else -1.0
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def _usage(n_tokens):
+    return {"prompt_tokens": n_tokens, "total_tokens": n_tokens}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    # set by make_server
+    rate_limit_every = 0
+    latency = 0.0
+    counter = None
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        req = json.loads(self.rfile.read(length) or b"{}")
+
+        with self.counter["lock"]:
+            self.counter["n"] += 1
+            n = self.counter["n"]
+        if self.rate_limit_every and n % self.rate_limit_every == 0:
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                       {"Retry-After": "0.05"})
+            return
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path.rstrip("/").endswith("/embeddings"):
+            inputs = req.get("input") or []
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            dim = int(req.get("dimensions") or DEFAULT_DIMENSIONS)
+            data = [{"object": "embedding", "index": i, "embedding": fake_embedding(t, dim)}
+                    for i, t in enumerate(inputs)]
+            tokens = sum(len(t.split()) for t in inputs)
+            self._send(200, {"object": "list", "data": data, "model": req.get("model"), "usage": _usage(tokens)})
+            return
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            prompt = "\n".join(str(m.get("content", "")) for m in req.get("messages", []))
+            digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+            content = f"[fake {req.get('model')}] {len(prompt.split())} prompt words, digest {digest}"
+            self._send(200, {
+                "id": f"chatcmpl-{digest}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 8,
+                          "total_tokens": len(prompt.split()) + 8},
+            })
+            return
+
+        self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+
+def make_server(host="127.0.0.1", port=0, rate_limit_every=0, latency=0.0):
+    # port=0 picks a free port; see server.server_address
+    handler = type("Handler", (FakeOpenAIHandler,), {
+        "rate_limit_every": rate_limit_every,
+        "latency": latency,
+        "counter": {"n": 0, "lock": threading.Lock()},
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake OpenAI API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each response")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.rate_limit_every, args.latency)
+    host, port = server.server_address[:2]
+    print(f"Fake OpenAI API on http://{host}:{port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
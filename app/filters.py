@@ -0,0 +1,115 @@
+# app/filters.py
+#
+# Hard (must-match) filters on structured resume attributes, evaluated on
+# the MetaStore before the vector search:
+#
+#   required_skills   every skill must be present (inverted skill index;
+#                     aliases map to their canonical skill)
+#   min/max_years     inclusive range on years_experience (sorted years)
+#   file_types        e.g. ["pdf", "docx"]
+#   ingested_after / ingested_before   unix time, date or datetime
+#
+# The result is a row mask; search turns it into a FAISS ID selector.
+
+from datetime import date, datetime
+
+import numpy as np
+
+from app.skills import canonical_skills
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    return float(value)
+
+
+class ResumeFilter:
+    def __init__(self, required_skills=None, min_years=None, max_years=None, file_types=None,
+                 ingested_after=None, ingested_before=None):
+        self.required_skills = sorted(canonical_skills(required_skills))
+        self.min_years = min_years
+        self.max_years = max_years
+        self.file_types = sorted({t.lower().lstrip(".") for t in file_types or []})
+        self.ingested_after = _timestamp(ingested_after)
+        self.ingested_before = _timestamp(ingested_before)
+
+    def __bool__(self):
+        return bool(
+            self.required_skills or self.file_types
+            or self.min_years is not None or self.max_years is not None
+            or self.ingested_after is not None or self.ingested_before is not None
+        )
+
+    def __repr__(self):
+        fields = {k: v for k, v in vars(self).items() if v not in (None, [])}
+        return f"ResumeFilter({', '.join(f'{k}={v!r}' for k, v in fields.items())})"
+
+    # -------------------------------
+    # ROW MASK
+    # -------------------------------
+    def mask(self, metas):
+        # boolean array over MetaStore rows
+        n = len(metas)
+        mask = np.ones(n, dtype=bool)
+
+        # rarest skill first; stop as soon as nothing is left
+        postings = [self._skill_rows(metas, s) for s in self.required_skills]
+        for rows in sorted(postings, key=len):
+            hit = np.zeros(n, dtype=bool)
+            hit[rows] = True
+            mask &= hit
+            if not mask.any():
+                return mask
+
+        if self.min_years is not None or self.max_years is not None:
+            lo = 0 if self.min_years is None else np.searchsorted(metas.years_sorted, self.min_years, "left")
+            hi = n if self.max_years is None else np.searchsorted(metas.years_sorted, self.max_years, "right")
+            hit = np.zeros(n, dtype=bool)
+            hit[metas.years_order[lo:hi]] = True
+            mask &= hit
+
+        if self.file_types:
+            codes = [c for c, t in enumerate(metas.file_types) if t in self.file_types]
+            mask &= np.isin(metas.file_type_codes, codes)
+
+        if self.ingested_after is not None:
+            mask &= metas.ingested_at >= self.ingested_after
+        if self.ingested_before is not None:
+            mask &= metas.ingested_at < self.ingested_before
+        return mask
+
+    @staticmethod
+    def _skill_rows(metas, skill):
+        # union over vocabulary entries that differ only in case
+        codes = metas.skill_codes_for([skill])
+        if len(codes) == 1:
+            return metas.rows_with_skill(codes[0])
+        return np.unique(np.concatenate(
+            [metas.rows_with_skill(c) for c in codes] or [np.zeros(0, dtype="int64")]
+        ))
+
+    def ids(self, metas):
+        return metas.ids[self.mask(metas)]
+
+
+# a bitmap is only built while it is no larger than the ids themselves
+# (one bit per id up to the largest vs 8 bytes per id)
+BITMAP_MAX_SPAN = 64
+
+
+def id_bitmap(ids):
+    # bitmap over vector ids for faiss.IDSelectorBitmap (bit i of byte i >> 3);
+    # None when the ids are too sparse for one, e.g. a few resumes out of
+    # many or chunk-level vector ids (resume id * CHUNK_STRIDE + chunk)
+    ids = np.asarray(ids, dtype="int64")
+    span = int(ids.max()) + 1 if len(ids) else 1
+    if span > BITMAP_MAX_SPAN * max(len(ids), 1):
+        return None
+    bits = np.zeros(span, dtype=bool)
+    bits[ids] = True
+    return np.packbits(bits, bitorder="little")
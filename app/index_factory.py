@@ -0,0 +1,309 @@
+# app/index_factory.py
+#
+# FAISS index construction for the resume store.
+#
+#   flat   exact inner-product scan (default)
+#   fp16   exhaustive scan over float16 vectors (half the memory of flat)
+#   sq8    exhaustive scan over 8-bit scalar-quantized vectors (a quarter)
+#   pq     exhaustive scan over product-quantized codes of PQ_M bytes
+#   ivf    IVF-Flat: coarse k-means partitions, scans `nprobe` of them
+#   ivfpq  IVF-PQ: as ivf, vectors product-quantized to PQ_M bytes
+#   hnsw   HNSW graph, search breadth `efSearch`
+#
+# All kinds store vectors under the caller's int64 ids. sq8 / pq / ivf /
+# ivfpq are trained on the vectors they are built with; add_vectors
+# retrains them when an update would not fit that training (see UPDATE).
+
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import faiss
+
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 -> ~4*sqrt(n)
+PQ_M = int(os.getenv("PQ_M", "48"))  # sub-quantizers; must divide the dimension
+PQ_NBITS = int(os.getenv("PQ_NBITS", "8"))
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+TRAIN_SAMPLE = int(os.getenv("INDEX_TRAIN_SAMPLE", "100000"))
+# retrain once this share of a trained index was added after its training
+RETRAIN_FRACTION = float(os.getenv("INDEX_RETRAIN_FRACTION", "0.2"))
+
+# query-time defaults
+NPROBE = int(os.getenv("INDEX_NPROBE", "16"))
+EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", "64"))
+
+INDEX_KINDS = ("flat", "fp16", "sq8", "pq", "ivf", "ivfpq", "hnsw")
+# kinds that score every stored vector (no nprobe / efSearch)
+EXHAUSTIVE_KINDS = ("flat", "fp16", "sq8", "pq")
+# kinds whose codebooks / ranges / centroids are learned from the data
+TRAINED_KINDS = ("sq8", "pq", "ivf", "ivfpq")
+
+# k-means wants ~39 points per centroid
+_MIN_POINTS_PER_CENTROID = 39
+# sq8 clips values to the per-dimension ranges seen in training; a new
+# (unit) vector losing more than this much of its length to clipping forces
+# a retrain. In-distribution updates stay well below it; very short resumes
+# (a handful of words, so a few large components) go far above.
+_SQ8_MAX_CLIP = 0.2
+
+
+# -------------------------------
+# BUILD
+# -------------------------------
+def _auto_nlist(n):
+    nlist = IVF_NLIST or int(4 * math.sqrt(max(n, 1)))
+    return max(1, min(nlist, n // _MIN_POINTS_PER_CENTROID))
+
+
+def _training_sample(vectors, seed=0):
+    if len(vectors) <= TRAIN_SAMPLE:
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[np.sort(rng.choice(len(vectors), TRAIN_SAMPLE, replace=False))]
+
+
+def _min_train_points(kind):
+    if kind in ("ivf", "sq8"):
+        return _MIN_POINTS_PER_CENTROID
+    if kind in ("ivfpq", "pq"):
+        return (1 << PQ_NBITS) * _MIN_POINTS_PER_CENTROID // 4
+    return 0
+
+
+def new_index(kind, dim, n_train=0):
+    if kind == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+    if kind in ("fp16", "sq8"):
+        qtype = faiss.ScalarQuantizer.QT_fp16 if kind == "fp16" else faiss.ScalarQuantizer.QT_8bit
+        return faiss.IndexIDMap2(faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT))
+    if kind == "pq":
+        return faiss.IndexIDMap2(faiss.IndexPQ(dim, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT))
+    if kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return faiss.IndexIDMap2(hnsw)
+    if kind in ("ivf", "ivfpq"):
+        nlist = _auto_nlist(n_train)
+        quantizer = faiss.IndexFlatIP(dim)
+        if kind == "ivf":
+            return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+    raise ValueError(f"Unknown index type {kind!r}; expected one of {INDEX_KINDS}")
+
+
+def build_index(vectors, ids, kind=None):
+    # vectors: normalized float32 (n, dim). Trained kinds fall back to flat
+    # while there are too few vectors to train them meaningfully.
+    kind = kind or INDEX_TYPE
+    n, dim = vectors.shape
+    if n < _min_train_points(kind):
+        kind = "flat"
+
+    index = new_index(kind, dim, n_train=n)
+    if not index.is_trained:
+        index.train(_training_sample(vectors))
+    if n:
+        index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+    return index
+
+
+def index_kind(index):
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(inner, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(inner, faiss.IndexScalarQuantizer):
+        return "fp16" if inner.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+    if isinstance(inner, faiss.IndexPQ):
+        return "pq"
+    return "flat"
+
+
+# -------------------------------
+# UPDATE
+# -------------------------------
+def stored_vectors(index):
+    # (vectors, ids) held by the index; decoded, so lossy for sq8 / pq / ivfpq
+    if isinstance(index, faiss.IndexIVF):
+        ids = np.concatenate([
+            faiss.rev_swig_ptr(index.invlists.get_ids(l), index.invlists.list_size(l)).copy()
+            for l in range(index.nlist)
+        ] or [np.zeros(0, dtype="int64")])
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index.reconstruct_batch(ids), ids
+    return index.index.reconstruct_n(0, index.ntotal), faiss.vector_to_array(index.id_map)
+
+
+def _outside_trained_range(index, vectors):
+    if index_kind(index) != "sq8" or not len(vectors):
+        return False
+    trained = faiss.vector_to_array(faiss.downcast_index(index.index).sq.trained)
+    vmin, vdiff = trained[:index.d], trained[index.d:]
+    clipped = vectors - np.clip(vectors, vmin, vmin + vdiff)
+    return bool((np.linalg.norm(clipped, axis=1) > _SQ8_MAX_CLIP).any())
+
+
+def add_vectors(index, vectors, ids, added=0, kind=None):
+    # adds vectors under ids; returns (index, vectors added since training).
+    # added counts the earlier ones. A trained kind is rebuilt -- retrained on
+    # its stored vectors plus the new ones -- when the new vectors fall
+    # outside the sq8 ranges or the added share passes RETRAIN_FRACTION; a
+    # flat fallback is rebuilt as `kind` (INDEX_TYPE) once it is big enough.
+    kind = kind or INDEX_TYPE
+    current = index_kind(index)
+    added += len(ids)
+    retrain = (current == "flat" and kind != "flat") or (current in TRAINED_KINDS and (
+        added > RETRAIN_FRACTION * (index.ntotal + len(ids)) or _outside_trained_range(index, vectors)))
+    if not retrain:
+        if len(ids):
+            index.add_with_ids(vectors, np.asarray(ids, dtype="int64"))
+        return index, added
+
+    old, old_ids = stored_vectors(index)
+    index = build_index(np.vstack([old, vectors]), np.concatenate([old_ids, np.asarray(ids, dtype="int64")]),
+                        kind)
+    return index, 0
+
+
+def remove_ids(index, ids):
+    # HNSW graphs cannot delete nodes; rebuild the graph from the stored
+    # vectors of the ids that remain (no re-embedding needed).
+    ids = np.asarray(ids, dtype="int64")
+    if index_kind(index) != "hnsw":
+        index.remove_ids(ids)
+        return index
+
+    all_ids = faiss.vector_to_array(index.id_map)
+    keep = ~np.isin(all_ids, ids)
+    vectors = index.index.reconstruct_n(0, index.ntotal)[keep]
+    rebuilt = new_index("hnsw", index.d)
+    if keep.any():
+        rebuilt.add_with_ids(vectors, all_ids[keep])
+    return rebuilt
+
+
+# -------------------------------
+# SEARCH
+# -------------------------------
+def search_params(index, nprobe=None, ef_search=None, **kw):
+    # per-query parameters; extra kwargs (e.g. sel) are passed through
+    kind = index_kind(index)
+    if kind in ("ivf", "ivfpq"):
+        return faiss.SearchParametersIVF(nprobe=nprobe or NPROBE, **kw)
+    if kind == "hnsw":
+        return faiss.SearchParametersHNSW(efSearch=ef_search or EF_SEARCH, **kw)
+    return faiss.SearchParameters(**kw) if kw else None
+
+
+# -------------------------------
+# RECALL / LATENCY REPORT
+# -------------------------------
+def _timed_search(index, queries, k, params):
+    start = time.perf_counter()
+    _, I = index.search(queries, k, params=params)
+    return I, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def _updated_index(vectors, ids, kind, fraction, batches=4):
+    # built on the first 1 - fraction of the vectors, the rest added in
+    # batches through add_vectors like incremental builds; (index, retrained)
+    n0 = int(len(vectors) * (1 - fraction))
+    index = build_index(vectors[:n0], ids[:n0], kind)
+    added, retrained = 0, False
+    for part in np.array_split(np.arange(n0, len(vectors)), batches):
+        index, added = add_vectors(index, vectors[part], ids[part], added, kind)
+        retrained |= added == 0 and len(part) > 0
+    return index, retrained
+
+
+def recall_report(vectors, queries, k=10, configs=None, update_fraction=0.2):
+    # configs: list of (kind, {"nprobe": ..} / {"ef_search": ..}); recall@k
+    # is measured against the exact flat index over the same vectors. Trained
+    # kinds are also reported after an incremental update that adds the
+    # last update_fraction of the vectors (0 skips those rows).
+    ids = np.arange(len(vectors), dtype="int64")
+    configs = configs or [
+        ("flat", {}), ("fp16", {}), ("sq8", {}), ("pq", {}),
+        ("ivf", {"nprobe": 8}), ("ivf", {"nprobe": 32}),
+        ("ivfpq", {"nprobe": 8}), ("ivfpq", {"nprobe": 32}),
+        ("hnsw", {"ef_search": 32}), ("hnsw", {"ef_search": 128}),
+    ]
+
+    exact = build_index(vectors, ids, "flat")
+    truth, _ = _timed_search(exact, queries, k, None)
+
+    runs = [(kind, params, False) for kind, params in configs]
+    if update_fraction:
+        runs += [(kind, params, True) for kind, params in configs if kind in TRAINED_KINDS]
+
+    built = {}
+    rows = []
+    for kind, params, updated in runs:
+        if (kind, updated) not in built:
+            start = time.perf_counter()
+            if updated:
+                index, retrained = _updated_index(vectors, ids, kind, update_fraction)
+            else:
+                index, retrained = build_index(vectors, ids, kind), False
+            built[kind, updated] = (index, retrained, time.perf_counter() - start)
+        index, retrained, build_s = built[kind, updated]
+
+        found, ms = _timed_search(index, queries, k, search_params(index, **params))
+        hits = sum(len(np.intersect1d(t, f[f >= 0])) for t, f in zip(truth, found))
+        index_mb = len(faiss.serialize_index(index)) / 2**20
+        rows.append({
+            "kind": index_kind(index),
+            "params": params,
+            # "retrained" if the update rebuilt the index, else "added"
+            "update": ("retrained" if retrained else "added") if updated else "-",
+            f"recall@{k}": hits / (k * len(queries)),
+            "ms_per_query": ms,
+            "build_s": build_s,
+            "index_mb": index_mb,
+            "mb_per_million": index_mb * 1e6 / len(vectors),
+        })
+    return rows
+
+
+def _synthetic_vectors(n, dim, clusters, seed):
+    # clustered unit vectors, closer to real embeddings than uniform noise
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype("float32")
+    vectors = centers[rng.integers(0, clusters, n)] + 0.5 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recall, latency and memory of the index types against exact search.")
+    parser.add_argument("--n", type=int, default=100000, help="number of indexed vectors")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--update-fraction", type=float, default=0.2,
+                        help="share of the vectors added by an incremental update for the 'update' rows (0: none)")
+    args = parser.parse_args(argv)
+
+    vectors = _synthetic_vectors(args.n + args.queries, args.dim, args.clusters, args.seed)
+    rows = recall_report(vectors[:args.n], vectors[args.n:], k=args.k, update_fraction=args.update_fraction)
+
+    print(f"{'kind':6} {'params':20} {'update':9} {'recall@' + str(args.k):>10} {'ms/query':>9} {'build s':>8} "
+          f"{'MB':>8} {'MB/1M':>8}")
+    for r in rows:
+        params = ",".join(f"{k}={v}" for k, v in r["params"].items()) or "-"
+        print(f"{r['kind']:6} {params:20} {r['update']:9} {r[f'recall@{args.k}']:10.3f} "
+              f"{r['ms_per_query']:9.3f} {r['build_s']:8.2f} {r['index_mb']:8.1f} {r['mb_per_million']:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
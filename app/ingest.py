@@ -0,0 +1,194 @@
+# app/ingest.py
+#
+# Parallel text extraction + parsing for index builds. Deliberately does not
+# import app.embedder so that pool workers stay light.
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from app.resume_parser import load_resume_text, parse_resume_sections
+
+# 0 -> os.cpu_count()
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+# files handed to a worker per task
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "8"))
+# seconds allowed per file before it is abandoned
+INGEST_FILE_TIMEOUT = float(os.getenv("INGEST_FILE_TIMEOUT", "120"))
+
+
+class FileTimeout(Exception):
+    pass
+
+
+# -------------------------------
+# PER-FILE PROCESSING
+# -------------------------------
+def make_search_text(parsed):
+    # Create search_text containing skills + experience + education
+    search_text = " ".join([
+        " ".join(parsed.get("skills", [])),
+        parsed.get("experience", ""),
+        parsed.get("education", "")
+    ]).strip()
+    if not search_text:
+        search_text = parsed["full_text"][:2000]
+    return search_text
+
+
+def make_meta(name, parsed):
+    return {
+        "file": name,
+        "full_text": parsed["full_text"],
+        "skills": parsed.get("skills", []),
+        "years_experience": parsed.get("years_experience", 0),
+        "ingested_at": time.time()
+    }
+
+
+def process_file(f):
+    f = Path(f)
+    text = load_resume_text(f)
+    parsed = parse_resume_sections(text)
+    return make_search_text(parsed), make_meta(f.name, parsed)
+
+
+def _raise_timeout(signum, frame):
+    raise FileTimeout()
+
+
+def _process_one(path, timeout):
+    # SIGALRM can only be installed from a process' main thread; pool workers
+    # always qualify, in-process (serial) runs under Streamlit usually don't.
+    use_alarm = (
+        timeout and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        search_text, meta = process_file(path)
+        return path, search_text, meta, None
+    except FileTimeout:
+        return path, None, None, f"timed out after {timeout:g}s"
+    except Exception as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def _process_chunk(paths, timeout):
+    return [_process_one(p, timeout) for p in paths]
+
+
+# -------------------------------
+# PIPELINE
+# -------------------------------
+def iter_parsed(paths, workers=None, chunk_size=None, timeout=None):
+    """Yield (path, search_text, meta, error) for every path.
+
+    Results arrive in completion order. A file that raises or exceeds the
+    timeout yields an error string instead of a record; it never aborts
+    the rest of the run.
+    """
+    paths = [str(p) for p in paths]
+    workers = workers or INGEST_WORKERS or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size or INGEST_CHUNK_SIZE)
+    timeout = INGEST_FILE_TIMEOUT if timeout is None else timeout
+
+    if workers <= 1 or len(paths) <= 1:
+        for p in paths:
+            yield _process_one(p, timeout)
+        return
+
+    pending = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    pending.reverse()
+    max_in_flight = workers * 2
+    suspects = []
+
+    while pending:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+        in_flight = {}
+        broken = False
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < max_in_flight:
+                    chunk = pending.pop()
+                    in_flight[pool.submit(_process_chunk, chunk, timeout)] = chunk
+
+                # parent-side guard in case a worker hangs inside native code
+                done, _ = wait(in_flight, timeout=_guard_timeout(timeout, chunk_size),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    raise BrokenProcessPool("ingestion worker stopped responding")
+
+                for fut in done:
+                    chunk = in_flight.pop(fut)
+                    try:
+                        results = fut.result()
+                    except BrokenProcessPool:
+                        suspects.extend(chunk)
+                        broken = True
+                        continue
+                    yield from results
+                if broken:
+                    break
+        except BrokenProcessPool:
+            broken = True
+        finally:
+            if broken:
+                for chunk in in_flight.values():
+                    suspects.extend(chunk)
+                _kill(pool)
+            else:
+                pool.shutdown()
+
+    # A crashed or hung worker takes its whole pool down, so every file that
+    # was in flight at the time is re-run alone to find the culprit.
+    yield from _run_isolated(suspects, timeout)
+
+
+def _mp_context():
+    # pools are started from Streamlit and index-worker threads; forking a
+    # process whose other threads hold FAISS/OpenMP or SQLite locks can
+    # deadlock the child, so workers come from a fork server (or are spawned)
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _guard_timeout(timeout, n_files):
+    return timeout * n_files + 30 if timeout else None
+
+
+def _kill(pool):
+    # shutdown() does not stop a worker stuck in native code
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_isolated(paths, timeout):
+    pool = None
+    for p in paths:
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=1, mp_context=_mp_context())
+        fut = pool.submit(_process_chunk, [p], timeout)
+        try:
+            results = fut.result(timeout=_guard_timeout(timeout, 1))
+        except (BrokenProcessPool, FuturesTimeout):
+            _kill(pool)
+            pool = None
+            yield p, None, None, "worker process crashed or hung"
+            continue
+        yield from results
+    if pool is not None:
+        pool.shutdown()
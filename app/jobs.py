@@ -0,0 +1,305 @@
+# app/jobs.py
+#
+# Background indexing. Index builds are queued as jobs in a small SQLite
+# table and run by a worker thread, off the request path: inside the
+# Streamlit process (INDEX_WORKER=1, the default) or as a separate process.
+#
+#   python -m app.jobs enqueue data/resumes [--full]
+#   python -m app.jobs status
+#   python -m app.jobs worker
+#
+# All jobs queued for a folder when the worker gets to them run as one
+# incremental build (a full rebuild if any of them asks for it), so a burst
+# of uploads costs one build. Progress (stage, files done / total) and an ETA
+# are kept on the job rows; the finished build is published as a new index
+# generation (see app.search), so searches switch over atomically.
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from app.search import INDEX_ROOT, remove_orphaned_builds
+
+INDEX_JOBS_PATH = os.getenv("INDEX_JOBS_PATH", str(INDEX_ROOT / "jobs.sqlite"))
+INDEX_WORKER = os.getenv("INDEX_WORKER", "1") != "0"
+INDEX_JOBS_POLL_INTERVAL = float(os.getenv("INDEX_JOBS_POLL_INTERVAL", "1.0"))
+# a running job whose worker has not checked in for this long is re-queued
+INDEX_JOBS_STALE_AFTER = float(os.getenv("INDEX_JOBS_STALE_AFTER", "300"))
+_HEARTBEAT_INTERVAL = 10.0
+_PROGRESS_INTERVAL = 0.5
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+# -------------------------------
+# QUEUE
+# -------------------------------
+class JobQueue:
+    def __init__(self, path=INDEX_JOBS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # autocommit; claims take the write lock explicitly (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, folder TEXT NOT NULL, full_rebuild INTEGER NOT NULL,"
+                " files TEXT NOT NULL, status TEXT NOT NULL, created_at REAL NOT NULL,"
+                " started_at REAL, heartbeat REAL, finished_at REAL,"
+                " stage TEXT, done INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0,"
+                " result TEXT, error TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def enqueue(self, folder, files=(), full=False):
+        # files: names that triggered the job (informational; the build
+        # picks up every change in the folder). Returns the job id.
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (folder, full_rebuild, files, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (str(folder), int(full), json.dumps(list(files)), QUEUED, time.time()),
+            )
+            return cur.lastrowid
+
+    def claim(self):
+        # all queued jobs of the oldest waiting folder, marked running; []
+        # if nothing is queued or another worker is busy
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, stage = NULL WHERE status = ? AND heartbeat < ?",
+                    (QUEUED, RUNNING, now - INDEX_JOBS_STALE_AFTER),
+                )
+                busy = self._conn.execute("SELECT 1 FROM jobs WHERE status = ? LIMIT 1", (RUNNING,)).fetchone()
+                first = None if busy else self._conn.execute(
+                    "SELECT folder FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if first is None:
+                    self._conn.execute("COMMIT")
+                    return []
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND folder = ? ORDER BY id", (QUEUED, first["folder"])
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, started_at = ?, heartbeat = ?, stage = 'scan' WHERE id = ?",
+                    [(RUNNING, now, now, r["id"]) for r in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [_job(r) for r in rows]
+
+    def heartbeat(self, ids):
+        self._update(ids, "heartbeat = ?", time.time())
+
+    def progress(self, ids, stage, done, total):
+        self._update(ids, "stage = ?, done = ?, total = ?, heartbeat = ?", stage, done, total, time.time())
+
+    def finish(self, ids, result=None, error=None):
+        self._update(ids, "status = ?, finished_at = ?, stage = NULL, result = ?, error = ?",
+                     FAILED if error else DONE, time.time(),
+                     json.dumps(result) if result is not None else None, error)
+
+    def _update(self, ids, assignments, *values):
+        with self._lock:
+            self._conn.executemany(f"UPDATE jobs SET {assignments} WHERE id = ?", [(*values, i) for i in ids])
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def active(self):
+        # running and queued jobs, oldest first
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY id", (RUNNING, QUEUED)
+            ).fetchall()
+        return [_job(r) for r in rows]
+
+    def recent(self, limit=10):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [_job(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _job(row):
+    job = dict(row)
+    job["full_rebuild"] = bool(job["full_rebuild"])
+    job["files"] = json.loads(job["files"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["eta_s"] = _eta(job)
+    return job
+
+
+def _eta(job):
+    # seconds left in the ingest stage, extrapolated from its rate so far
+    if job["status"] != RUNNING or job["stage"] != "ingest" or not job["done"]:
+        return None
+    elapsed = time.time() - job["started_at"]
+    return elapsed / job["done"] * (job["total"] - job["done"])
+
+
+# -------------------------------
+# WORKER
+# -------------------------------
+class IndexWorker:
+    def __init__(self, queue=None, poll_interval=INDEX_JOBS_POLL_INTERVAL):
+        self.queue = queue or JobQueue()
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="index-worker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        # temp dirs of builds that died with an earlier worker
+        remove_orphaned_builds()
+        while not self._stop.is_set():
+            if not self.run_once():
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_once(self):
+        # runs one batch of jobs; False if there was nothing to do
+        jobs = self.queue.claim()
+        if not jobs:
+            return False
+        from app.utils import build_index_from_folder
+
+        ids = [j["id"] for j in jobs]
+        last = 0.0
+
+        def progress(stage, done, total):
+            nonlocal last
+            now = time.monotonic()
+            if stage != "ingest" or done == total or now - last >= _PROGRESS_INTERVAL:
+                last = now
+                self.queue.progress(ids, stage, done, total)
+
+        # keeps the jobs alive while the index is trained / written
+        building = threading.Event()
+
+        def beat():
+            while not building.wait(_HEARTBEAT_INTERVAL):
+                self.queue.heartbeat(ids)
+
+        threading.Thread(target=beat, name="index-worker-heartbeat", daemon=True).start()
+        try:
+            stats = build_index_from_folder(jobs[0]["folder"], incremental=not any(j["full_rebuild"] for j in jobs),
+                                            progress=progress)
+        except Exception as e:
+            self.queue.finish(ids, error=f"{type(e).__name__}: {e}")
+        else:
+            self.queue.finish(ids, result=stats)
+        finally:
+            building.set()
+        return True
+
+
+_queue = None
+_worker = None
+_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
+
+
+def get_worker():
+    # the in-process worker, started on first use
+    global _worker
+    if _worker is None:
+        queue = get_queue()
+        with _lock:
+            if _worker is None:
+                _worker = IndexWorker(queue).start()
+    return _worker
+
+
+def enqueue_build(folder, files=(), full=False):
+    # queue a build and nudge the in-process worker, if there is one
+    job_id = get_queue().enqueue(folder, files, full)
+    if _worker is not None:
+        _worker.wake()
+    return job_id
+
+
+# -------------------------------
+# CLI
+# -------------------------------
+def _describe(job):
+    line = f"#{job['id']} {job['status']:8} {job['folder']}" + (" (full)" if job["full_rebuild"] else "")
+    if job["status"] == RUNNING:
+        line += f" {job['stage']} {job['done']}/{job['total']}"
+        if job["eta_s"] is not None:
+            line += f" eta {job['eta_s']:.0f}s"
+    elif job["status"] == DONE and job["result"]:
+        r = job["result"]
+        line += f" total {r['total']} (+{r['added']} ~{r['updated']} -{r['removed']}, {r['failed']} failed)"
+    elif job["status"] == FAILED:
+        line += f" {job['error']}"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Background index build queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enqueue = sub.add_parser("enqueue", help="queue a build of a resume folder")
+    enqueue.add_argument("folder", nargs="?", default="data/resumes")
+    enqueue.add_argument("--full", action="store_true", help="full rebuild instead of incremental")
+    sub.add_parser("status", help="show recent jobs")
+    sub.add_parser("worker", help="process jobs until interrupted")
+    args = parser.parse_args(argv)
+
+    if args.command == "enqueue":
+        print(f"queued job #{enqueue_build(args.folder, full=args.full)}")
+    elif args.command == "status":
+        for job in get_queue().recent():
+            print(_describe(job))
+    else:
+        worker = IndexWorker(get_queue())
+        print(f"index worker on {worker.queue.path}", file=sys.stderr)
+        try:
+            worker._run()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+# app/metastore.py
+#
+# Columnar, memory-mapped resume metadata (replaces meta.pkl).
+#
+#   meta.json           header {version, rows}; written last
+#   ids.npy             int64 vector ids, sorted ascending
+#   years.npy           float32 years_experience
+#   skill_counts.npy    int32 number of skills per row
+#   skill_indptr.npy    int64 CSR row pointer into skill_codes
+#   skill_codes.npy     int32 codes into skill_vocab.json
+#   file_offsets.npy    int64 offsets into file.bin (utf-8 file names)
+#   text_offsets.npy    int64 offsets into text.bin (utf-8 full text)
+#   ingested_at.npy     float64 unix time the file was parsed
+#   file_type_codes.npy int8 codes into file_types.json ("pdf", "docx", ..)
+#   chunk_counts.npy    int32 vectors per resume (see app.chunking)
+#
+# Filter indexes (see app.filters):
+#   posting_indptr.npy  int64 per skill code, pointer into posting_rows
+#   posting_rows.npy    int64 rows having that skill, ascending
+#   years_order.npy     int64 rows sorted by years (stable)
+#   years_sorted.npy    float32 years[years_order]
+#
+# Arrays are opened with mmap so a load only touches the header; ranking
+# reads years/skills, and names/full text are decoded for the rows shown.
+# Version 1 stores (without the ingestion/file type columns and filter
+# indexes) are still readable; the indexes are derived in memory.
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+STORE_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+HEADER = "meta.json"
+
+
+# -------------------------------
+# WRITE
+# -------------------------------
+def _replace(path: Path, write):
+    # write to a new inode and rename over the old file, so readers that
+    # still mmap the previous version are unaffected
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _save_array(path: Path, arr):
+    _replace(path, lambda f: np.save(f, arr))
+
+
+def _save_strings(path: Path, name, values):
+    offsets = np.zeros(len(values) + 1, dtype="int64")
+    encoded = [v.encode("utf-8") for v in values]
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    _replace(path / f"{name}.bin", lambda f: f.writelines(encoded))
+    _save_array(path / f"{name}_offsets.npy", offsets)
+
+
+def _save_json(path: Path, value):
+    _replace(path, lambda f: f.write(json.dumps(value).encode("utf-8")))
+
+
+def file_type(name):
+    # "resume.PDF" -> "pdf"
+    return Path(name).suffix.lower().lstrip(".")
+
+
+def skill_postings(indptr, codes, n_vocab):
+    # inverse of the row -> skills CSR: skill code -> ascending rows
+    indptr = np.asarray(indptr, dtype="int64")
+    codes = np.asarray(codes, dtype="int64")
+    rows = np.repeat(np.arange(len(indptr) - 1, dtype="int64"), np.diff(indptr))
+    order = np.argsort(codes, kind="stable")  # rows stay ascending per code
+    posting_indptr = np.zeros(n_vocab + 1, dtype="int64")
+    np.cumsum(np.bincount(codes, minlength=n_vocab), out=posting_indptr[1:])
+    return posting_indptr, rows[order]
+
+
+def write_metastore(path, records, chunk_stride=0):
+    # records: iterable of (id, meta dict with file/full_text/skills/years_experience
+    # and optionally ingested_at / chunks). chunk_stride is recorded in the
+    # header when the index holds chunk vectors (vector id = id * stride + chunk).
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    records = sorted(records, key=lambda r: r[0])
+
+    vocab = {}
+    codes, indptr = [], [0]
+    for _, meta in records:
+        for s in meta.get("skills", []):
+            codes.append(vocab.setdefault(s, len(vocab)))
+        indptr.append(len(codes))
+
+    types = {}
+    type_codes = [types.setdefault(file_type(m["file"]), len(types)) for _, m in records]
+
+    _save_strings(path, "file", [m["file"] for _, m in records])
+    _save_strings(path, "text", [m.get("full_text", "") for _, m in records])
+    _save_columns(
+        path, chunk_stride,
+        ids=np.array([r[0] for r in records], dtype="int64"),
+        years=np.array([m.get("years_experience", 0) for _, m in records], dtype="float32"),
+        skill_indptr=np.array(indptr, dtype="int64"),
+        skill_codes=np.array(codes, dtype="int32"),
+        skill_vocab=list(vocab),
+        ingested_at=np.array([m.get("ingested_at", 0) for _, m in records], dtype="float64"),
+        file_type_codes=np.array(type_codes, dtype="int8"),
+        file_types=list(types),
+        chunk_counts=np.array([m.get("chunks", 1) for _, m in records], dtype="int32"),
+    )
+
+
+def _save_columns(path, chunk_stride, ids, years, skill_indptr, skill_codes, skill_vocab, ingested_at,
+                  file_type_codes, file_types, chunk_counts):
+    # everything but the string blobs, then the header
+    years_order = np.argsort(years, kind="stable")
+    posting_indptr, posting_rows = skill_postings(skill_indptr, skill_codes, len(skill_vocab))
+
+    _save_array(path / "ids.npy", ids)
+    _save_array(path / "years.npy", years)
+    _save_array(path / "skill_indptr.npy", skill_indptr)
+    _save_array(path / "skill_counts.npy", np.diff(skill_indptr).astype("int32"))
+    _save_array(path / "skill_codes.npy", skill_codes)
+    _save_json(path / "skill_vocab.json", skill_vocab)
+    _save_array(path / "ingested_at.npy", ingested_at)
+    _save_array(path / "file_type_codes.npy", file_type_codes)
+    _save_array(path / "chunk_counts.npy", chunk_counts)
+    _save_json(path / "file_types.json", file_types)
+    _save_array(path / "posting_indptr.npy", posting_indptr)
+    _save_array(path / "posting_rows.npy", posting_rows)
+    _save_array(path / "years_order.npy", years_order.astype("int64"))
+    _save_array(path / "years_sorted.npy", years[years_order])
+
+    header = {"version": STORE_VERSION, "rows": len(ids), "chunk_stride": chunk_stride}
+    _replace(path / HEADER, lambda f: f.write(json.dumps(header).encode("utf-8")))
+
+
+# -------------------------------
+# MERGE (incremental updates)
+# -------------------------------
+# An update copies the previous store's columns as arrays (and its strings
+# as byte ranges) instead of decoding every row, so only the added records
+# go through Python.
+def merge_metastore(path, base, records, exclude=(), chunk_stride=0):
+    # base's rows minus the ids in `exclude`, plus records (id, meta), written
+    # as a new store at path. Returns (rows, new_rows): the new row of every
+    # base row (-1 if dropped) and of every record, in the order given.
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    records = list(records)
+    metas = [m for _, m in records]
+
+    kept = np.flatnonzero(~np.isin(base.ids, np.asarray(list(exclude), dtype="int64")))
+    ids = np.concatenate([base.ids[kept], np.array([r[0] for r in records], dtype="int64")])
+    order = np.argsort(ids, kind="stable")  # kept rows stay in order
+    position = np.empty(len(ids), dtype="int64")
+    position[order] = np.arange(len(ids))
+    rows = np.full(len(base), -1, dtype="int64")
+    rows[kept] = position[:len(kept)]
+
+    def column(old, new, dtype):
+        return np.concatenate([np.asarray(old)[kept], np.array(new, dtype=dtype)])[order]
+
+    vocab = {s: i for i, s in enumerate(base.skill_vocab)}
+    codes, indptr = [], [0]
+    for meta in metas:
+        for s in meta.get("skills", []):
+            codes.append(vocab.setdefault(s, len(vocab)))
+        indptr.append(len(codes))
+    old_indptr, old_codes = _csr_take(base.skill_indptr, base.skill_codes, kept)
+    skill_indptr, skill_codes = _csr_take(
+        np.concatenate([old_indptr, old_indptr[-1] + np.array(indptr[1:], dtype="int64")]),
+        np.concatenate([old_codes, np.array(codes, dtype="int32")]), order)
+    skill_codes, skill_vocab = _compact(skill_codes, list(vocab))
+
+    types = {t: i for i, t in enumerate(base.file_types)}
+    type_codes = column(base.file_type_codes, [types.setdefault(file_type(m["file"]), len(types)) for m in metas],
+                        "int8")
+    type_codes, file_types = _compact(type_codes, list(types))
+
+    _merge_strings(path, "file", base._file_offsets, base._file_blob, kept, [m["file"] for m in metas], order)
+    _merge_strings(path, "text", base._text_offsets, base._text_blob, kept,
+                   [m.get("full_text", "") for m in metas], order)
+    _save_columns(
+        path, chunk_stride,
+        ids=ids[order],
+        years=column(base.years, [m.get("years_experience", 0) for m in metas], "float32"),
+        skill_indptr=skill_indptr,
+        skill_codes=skill_codes.astype("int32"),
+        skill_vocab=skill_vocab,
+        ingested_at=column(base.ingested_at, [m.get("ingested_at", 0) for m in metas], "float64"),
+        file_type_codes=type_codes.astype("int8"),
+        file_types=file_types,
+        chunk_counts=column(base.chunk_counts, [m.get("chunks", 1) for m in metas], "int32"),
+    )
+    return rows, position[len(kept):]
+
+
+def _csr_take(indptr, values, rows):
+    # (indptr, values) of the given CSR rows, in that order
+    indptr = np.asarray(indptr, dtype="int64")
+    rows = np.asarray(rows, dtype="int64")
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    out = np.zeros(len(rows) + 1, dtype="int64")
+    np.cumsum(lengths, out=out[1:])
+    return out, np.asarray(values)[np.arange(out[-1]) + np.repeat(starts - out[:-1], lengths)]
+
+
+def _compact(codes, vocab):
+    # drops vocabulary entries no code refers to any more, renumbering codes
+    used = np.bincount(codes, minlength=len(vocab)) > 0
+    if used.all():
+        return codes, vocab
+    return (np.cumsum(used) - 1)[codes], [v for v, u in zip(vocab, used) if u]
+
+
+def _merge_strings(path: Path, name, offsets, blob, kept, values, order):
+    # like _save_strings for rows `kept` of (offsets, blob) followed by
+    # `values`, permuted by order; runs of consecutive old rows are copied
+    # as one byte range
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.asarray(offsets)
+    src = np.concatenate([kept, -1 - np.arange(len(encoded), dtype="int64")])[order]
+    old = src >= 0
+    lengths = np.zeros(len(src), dtype="int64")
+    lengths[old] = offsets[src[old] + 1] - offsets[src[old]]
+    lengths[~old] = [len(encoded[-1 - j]) for j in src[~old]]
+    new_offsets = np.zeros(len(src) + 1, dtype="int64")
+    np.cumsum(lengths, out=new_offsets[1:])
+
+    # a run starts at a new value, after one, or where the old rows skip
+    starts = np.flatnonzero(~old | ~np.r_[True, old[:-1]] | (np.diff(src, prepend=-2) != 1))
+    ends = np.r_[starts[1:], len(src)]
+
+    def write(f):
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            first = int(src[start])
+            if first < 0:
+                f.write(encoded[-1 - first])
+            else:
+                f.write(blob[offsets[first]:offsets[src[end - 1] + 1]])
+
+    _replace(path / f"{name}.bin", write)
+    _save_array(path / f"{name}_offsets.npy", new_offsets)
+
+
+# -------------------------------
+# READ
+# -------------------------------
+def _load_array(path: Path):
+    return np.load(path, mmap_mode="r")
+
+
+def _load_blob(path: Path):
+    # np.memmap refuses zero-length files
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype="uint8")
+    return np.memmap(path, dtype="uint8", mode="r")
+
+
+def _number(x):
+    x = float(x)
+    return int(x) if x.is_integer() else x
+
+
+class MetaStore:
+    def __init__(self, path):
+        path = Path(path)
+        header = json.loads((path / HEADER).read_text(encoding="utf-8"))
+        if header.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported metadata store version: {header.get('version')}")
+
+        self.path = path
+        self.chunk_stride = header.get("chunk_stride", 0)
+        self.ids = _load_array(path / "ids.npy")
+        self.years = _load_array(path / "years.npy")
+        self.skill_counts = _load_array(path / "skill_counts.npy")
+        self.skill_indptr = _load_array(path / "skill_indptr.npy")
+        self.skill_codes = _load_array(path / "skill_codes.npy")
+        self.skill_vocab = json.loads((path / "skill_vocab.json").read_text(encoding="utf-8"))
+        self._file_offsets = _load_array(path / "file_offsets.npy")
+        self._file_blob = _load_blob(path / "file.bin")
+        self._text_offsets = _load_array(path / "text_offsets.npy")
+        self._text_blob = _load_blob(path / "text.bin")
+        self._vocab_lower = None
+
+        if header["version"] >= 2:
+            self.ingested_at = _load_array(path / "ingested_at.npy")
+            self.file_type_codes = _load_array(path / "file_type_codes.npy")
+            self.chunk_counts = _load_array(path / "chunk_counts.npy")
+            self.file_types = json.loads((path / "file_types.json").read_text(encoding="utf-8"))
+            self.posting_indptr = _load_array(path / "posting_indptr.npy")
+            self.posting_rows = _load_array(path / "posting_rows.npy")
+            self.years_order = _load_array(path / "years_order.npy")
+            self.years_sorted = _load_array(path / "years_sorted.npy")
+        else:
+            self._derive_filter_columns()
+
+    def _derive_filter_columns(self):
+        # version 1 store: no ingestion times; the rest is rebuilt from the
+        # stored columns until the next write upgrades the store
+        types = {}
+        codes = [types.setdefault(file_type(self.file(r)), len(types)) for r in range(len(self))]
+        self.ingested_at = np.zeros(len(self), dtype="float64")
+        self.file_type_codes = np.array(codes, dtype="int8")
+        self.chunk_counts = np.ones(len(self), dtype="int32")
+        self.file_types = list(types)
+        self.posting_indptr, self.posting_rows = skill_postings(
+            self.skill_indptr, self.skill_codes, len(self.skill_vocab))
+        self.years_order = np.argsort(self.years, kind="stable")
+        self.years_sorted = np.asarray(self.years)[self.years_order]
+
+    @classmethod
+    def exists(cls, path):
+        return (Path(path) / HEADER).exists()
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---- id <-> row ----
+    def rows_for(self, ids):
+        # row index per id, -1 where the id is unknown
+        ids = np.asarray(ids, dtype="int64")
+        if not len(self.ids):
+            return np.full(len(ids), -1, dtype="int64")
+        rows = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == ids, rows, -1)
+
+    def __contains__(self, vid):
+        return self.rows_for([vid])[0] >= 0
+
+    def __getitem__(self, vid):
+        row = self.rows_for([vid])[0]
+        if row < 0:
+            raise KeyError(vid)
+        return self.record(row)
+
+    def get(self, vid, default=None):
+        row = self.rows_for([vid])[0]
+        return self.record(row) if row >= 0 else default
+
+    # ---- columns ----
+    @staticmethod
+    def _string(offsets, blob, row):
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def file(self, row):
+        return self._string(self._file_offsets, self._file_blob, row)
+
+    def full_text(self, row):
+        return self._string(self._text_offsets, self._text_blob, row)
+
+    def skill_codes_for(self, names):
+        # codes of every vocabulary entry matching one of `names` (lowercase)
+        if self._vocab_lower is None:
+            lower = {}
+            for code, s in enumerate(self.skill_vocab):
+                lower.setdefault(s.lower(), []).append(code)
+            self._vocab_lower = lower
+        codes = [c for n in names for c in self._vocab_lower.get(n, ())]
+        return np.array(codes, dtype="int32")
+
+    def skills(self, row):
+        codes = self.skill_codes[self.skill_indptr[row]:self.skill_indptr[row + 1]]
+        return [self.skill_vocab[c] for c in codes]
+
+    def rows_with_skill(self, code):
+        return self.posting_rows[self.posting_indptr[code]:self.posting_indptr[code + 1]]
+
+    def record(self, row, full_text=True):
+        meta = {
+            "file": self.file(row),
+            "skills": self.skills(row),
+            "years_experience": _number(self.years[row]),
+            "ingested_at": float(self.ingested_at[row]),
+        }
+        if self.chunk_stride:
+            meta["chunks"] = int(self.chunk_counts[row])
+        if full_text:
+            meta["full_text"] = self.full_text(row)
+        return meta
+
+    def records(self, exclude=()):
+        exclude = set(exclude)
+        for row, vid in enumerate(self.ids.tolist()):
+            if vid not in exclude:
+                yield vid, self.record(row)
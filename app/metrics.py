@@ -0,0 +1,313 @@
+# app/metrics.py
+#
+# Lightweight in-process instrumentation: timed spans around pipeline
+# stages, counters and histograms, exported in Prometheus text format or as
+# a JSONL trace, plus an optional profiler.
+#
+#   METRICS=1                   collect counters / histograms
+#   METRICS_TRACE_PATH=f.jsonl  also append one JSON line per finished span
+#   METRICS_PORT=9108           serve /metrics over HTTP (see serve)
+#   METRICS_PROFILE=cprofile    profile the outermost spans with cProfile
+#   METRICS_PROFILE=sample      sample all thread stacks every
+#                               METRICS_SAMPLE_INTERVAL seconds
+#   METRICS_PROFILE_PATH        profile output (.prof for cprofile, collapsed
+#                               stacks for sample; written at exit)
+#
+# With everything off, span() returns a shared no-op context manager and
+# @timed returns the function unchanged.
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+TRACE_PATH = os.getenv("METRICS_TRACE_PATH")
+PORT = int(os.getenv("METRICS_PORT", "0"))
+PROFILE = os.getenv("METRICS_PROFILE", "")  # "", "cprofile" or "sample"
+PROFILE_PATH = os.getenv("METRICS_PROFILE_PATH", "metrics.prof" if PROFILE == "cprofile" else "metrics.stacks")
+SAMPLE_INTERVAL = float(os.getenv("METRICS_SAMPLE_INTERVAL", "0.005"))
+ENABLED = os.getenv("METRICS", "0") == "1" or bool(TRACE_PATH) or bool(PORT) or bool(PROFILE)
+
+# seconds; stage latencies range from sub-millisecond searches to minute-long builds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+_lock = threading.Lock()
+_counters = defaultdict(float)  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts, sum, count]
+_trace_file = None
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+# -------------------------------
+# COUNTERS / HISTOGRAMS
+# -------------------------------
+def inc(name, value=1, **labels):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                hist[0][i] += 1
+                break
+        hist[1] += value
+        hist[2] += 1
+
+
+# -------------------------------
+# SPANS
+# -------------------------------
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_local = threading.local()
+
+
+class Span:
+    # records stage_duration_seconds{stage} and stage_calls_total{stage, status}
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def set(self, **labels):
+        # extra labels for the trace (e.g. item counts known only later)
+        self.labels.update(labels)
+
+    def __enter__(self):
+        depth = getattr(_local, "depth", 0)
+        _local.depth = depth + 1
+        # cProfile follows one thread; the first outermost span to arrive wins
+        if depth == 0 and _profiler is not None and _profiler_lock.acquire(blocking=False):
+            _local.profiling = True
+            _profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _local.depth -= 1
+        if _local.depth == 0 and getattr(_local, "profiling", False):
+            _profiler.disable()
+            _local.profiling = False
+            _profiler_lock.release()
+        status = "error" if exc_type else "ok"
+        observe("stage_duration_seconds", elapsed, stage=self.name)
+        inc("stage_calls_total", stage=self.name, status=status)
+        if _trace_file is not None:
+            _write_trace({
+                "ts": time.time() - elapsed,
+                "span": self.name,
+                "duration_ms": elapsed * 1000,
+                "status": status,
+                "depth": _local.depth,
+                "thread": threading.current_thread().name,
+                **self.labels,
+            })
+        return False
+
+
+def span(name, **labels):
+    # with span("search.dense", k=10): ...
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, labels)
+
+
+def timed(name=None):
+    # decorator form of span; a no-op wrapper-free pass-through when disabled
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+        stage = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        def inner(*args, **kwargs):
+            with Span(stage, {}):
+                return fn(*args, **kwargs)
+
+        inner.__name__, inner.__qualname__, inner.__doc__ = fn.__name__, fn.__qualname__, fn.__doc__
+        inner.__wrapped__ = fn
+        return inner
+    return wrap
+
+
+# -------------------------------
+# EXPORT
+# -------------------------------
+def _write_trace(record):
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        _trace_file.write(line)
+        _trace_file.flush()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text():
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+
+    lines = []
+    for metric in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {metric} counter")
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f"{name}{_labels_text(labels)} {value:g}")
+    for metric in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {metric} histogram")
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_labels_text(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels_text(labels)} {total:g}")
+            lines.append(f"{name}_count{_labels_text(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    # {"counters": {...}, "stages": {stage: {count, total_s, mean_ms}}}
+    with _lock:
+        counters = {f"{n}{_labels_text(l)}": v for (n, l), v in _counters.items()}
+        stages = {
+            dict(l).get("stage", n): {"count": c, "total_s": s, "mean_ms": s / c * 1000 if c else 0.0}
+            for (n, l), (_, s, c) in _histograms.items() if n == "stage_duration_seconds"
+        }
+    return {"counters": counters, "stages": stages}
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+_server = None
+
+
+def serve(port, host="0.0.0.0"):
+    # background HTTP server answering /metrics; started once per process
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+# -------------------------------
+# PROFILING
+# -------------------------------
+class StackSampler:
+    # wall-clock sampler: every `interval` seconds the stacks of all other
+    # threads are recorded; written as collapsed stacks (flamegraph.pl input)
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+_sampler = None
+
+
+def dump_profile(path=None):
+    path = path or PROFILE_PATH
+    if _profiler is not None:
+        _profiler.dump_stats(path)
+    elif _sampler is not None:
+        _sampler.dump(path)
+
+
+if TRACE_PATH:
+    _trace_file = open(TRACE_PATH, "a", encoding="utf-8")
+if PROFILE == "cprofile":
+    import cProfile
+    _profiler = cProfile.Profile()
+elif PROFILE == "sample":
+    _sampler = StackSampler().start()
+if PROFILE:
+    atexit.register(dump_profile)
@@ -0,0 +1,166 @@
+# app/openai_embeddings.py
+#
+# OpenAI embeddings for large inputs: token-aware batching, bounded async
+# concurrency, retry with backoff on rate limits / transient errors, results
+# in input order. Point OPENAI_BASE_URL at app.fake_openai to run offline.
+
+import asyncio
+import os
+import random
+import threading
+
+MODEL = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-small")
+# text-embedding-3 models can return shortened vectors; match the index DIM
+DIMENSIONS = int(os.getenv("OPENAI_EMBED_DIMENSIONS", "384"))
+MAX_INPUTS_PER_REQUEST = int(os.getenv("OPENAI_EMBED_MAX_INPUTS", "2048"))
+MAX_TOKENS_PER_REQUEST = int(os.getenv("OPENAI_EMBED_MAX_TOKENS", "250000"))
+MAX_TOKENS_PER_INPUT = 8191
+CONCURRENCY = int(os.getenv("OPENAI_EMBED_CONCURRENCY", "4"))
+MAX_RETRIES = int(os.getenv("OPENAI_EMBED_MAX_RETRIES", "6"))
+BACKOFF_BASE = float(os.getenv("OPENAI_EMBED_BACKOFF", "1.0"))
+BACKOFF_MAX = 60.0
+
+
+# -------------------------------
+# TOKENS
+# -------------------------------
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    # tiktoken is optional; without it tokens are estimated from length
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    enc = _get_encoding()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def _fit_input(text):
+    # returns (text clipped to the per-input limit, its token count)
+    text = text or " "  # the API rejects empty strings
+    enc = _get_encoding()
+    if enc:
+        tokens = enc.encode(text, disallowed_special=())
+        if len(tokens) > MAX_TOKENS_PER_INPUT:
+            tokens = tokens[:MAX_TOKENS_PER_INPUT]
+            text = enc.decode(tokens)
+        return text, len(tokens)
+
+    # ~4 characters per token for English text; stay conservative
+    max_chars = MAX_TOKENS_PER_INPUT * 3
+    text = text[:max_chars]
+    return text, len(text) // 3 + 1
+
+
+def make_batches(texts):
+    # consecutive (start, end) ranges within the per-request input and token caps
+    batches = []
+    start, tokens = 0, 0
+    for i, n in enumerate(texts):
+        if i > start and (i - start >= MAX_INPUTS_PER_REQUEST or tokens + n > MAX_TOKENS_PER_REQUEST):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += n
+    if start < len(texts):
+        batches.append((start, len(texts)))
+    return batches
+
+
+# -------------------------------
+# REQUESTS
+# -------------------------------
+def retry_delay(error, attempt):
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX) * (0.5 + random.random() / 2)
+
+
+def is_retryable(error):
+    import openai
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+async def _embed_batch(client, semaphore, inputs):
+    attempt = 0
+    while True:
+        async with semaphore:
+            try:
+                kw = {"dimensions": DIMENSIONS} if DIMENSIONS else {}
+                res = await client.embeddings.create(model=MODEL, input=inputs, **kw)
+                return [d.embedding for d in sorted(res.data, key=lambda d: d.index)]
+            except Exception as e:
+                if attempt >= MAX_RETRIES or not is_retryable(e):
+                    raise
+                delay = retry_delay(e, attempt)
+        # back off outside the semaphore so other batches keep going
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+async def embed_async(texts, concurrency=None):
+    from openai import AsyncOpenAI
+
+    fitted = [_fit_input(t) for t in texts]
+    inputs = [t for t, _ in fitted]
+    batches = make_batches([n for _, n in fitted])
+
+    # retries are handled here (with Retry-After), not inside the client
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    semaphore = asyncio.Semaphore(concurrency or CONCURRENCY)
+    try:
+        results = await asyncio.gather(*[
+            _embed_batch(client, semaphore, inputs[start:end]) for start, end in batches
+        ])
+    finally:
+        await client.close()
+
+    return [vec for batch in results for vec in batch]
+
+
+def run_coroutine(coro):
+    # asyncio.run, also when called from inside a running event loop
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    out = {}
+
+    def runner():
+        try:
+            out["result"] = asyncio.run(coro)
+        except BaseException as e:
+            out["error"] = e
+
+    t = threading.Thread(target=runner)
+    t.start()
+    t.join()
+    if "error" in out:
+        raise out["error"]
+    return out["result"]
+
+
+def embed(texts, concurrency=None):
+    if not texts:
+        return []
+    return run_coroutine(embed_async(list(texts), concurrency))
@@ -1,47 +1,120 @@
 # app/resume_parser.py
 
+import os
 import pdfplumber
 import docx2txt
 import re
 from pathlib import Path
 from datetime import datetime
 
+from app.skills import get_skill_matcher
+
+# pdfplumber | pypdfium2 | auto. pypdfium2 is faster but extracts slightly
+# different text, so it is opt-in; auto uses it whenever it is installed.
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfplumber")
+# optional extraction budget per resume; 0 = unlimited
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "0"))
+RESUME_MAX_CHARS = int(os.getenv("RESUME_MAX_CHARS", "0"))
+
 # -------------------------------
 # TEXT EXTRACTION
 # -------------------------------
-def extract_text_from_pdf(path):
-    text = []
+def _pdf_backend(backend=None):
+    backend = backend or PDF_BACKEND
+    if backend == "auto":
+        try:
+            import pypdfium2  # noqa: F401
+            return "pypdfium2"
+        except ImportError:
+            return "pdfplumber"
+    return backend
+
+def _iter_pages_pdfium(path, max_pages):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        n = len(pdf) if not max_pages else min(len(pdf), max_pages)
+        for i in range(n):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+
+def _iter_pages_pdfplumber(path, max_pages):
     with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            text.append(page.extract_text() or "")
-    return "\n".join(text)
+        for i, page in enumerate(pdf.pages):
+            if max_pages and i >= max_pages:
+                break
+            try:
+                yield page.extract_text() or ""
+            finally:
+                # drop the parsed layout objects of pages we are done with
+                close = getattr(page, "close", None) or getattr(page, "flush_cache", None)
+                if close:
+                    close()
+
+def iter_pdf_pages(path, max_pages=None, backend=None):
+    # yields the text of one page at a time; stop iterating to stop parsing
+    if _pdf_backend(backend) == "pypdfium2":
+        return _iter_pages_pdfium(str(path), max_pages)
+    return _iter_pages_pdfplumber(str(path), max_pages)
+
+def _clip(text, max_chars):
+    return text[:max_chars] if max_chars else text
 
-def extract_text_from_docx(path):
-    return docx2txt.process(path)
+def extract_text_from_pdf(path, max_pages=None, max_chars=None, backend=None):
+    text = []
+    size = 0
+    pages = iter_pdf_pages(path, max_pages, backend)
+    try:
+        for page_text in pages:
+            text.append(page_text)
+            size += len(page_text) + 1
+            if max_chars and size >= max_chars:
+                break
+    finally:
+        pages.close()
+    return _clip("\n".join(text), max_chars)
+
+def extract_text_from_docx(path, max_chars=None):
+    return _clip(docx2txt.process(path), max_chars)
 
-def load_resume_text(path):
+# max_pages / max_chars default to RESUME_MAX_PAGES / RESUME_MAX_CHARS
+def load_resume_text(path, max_pages=None, max_chars=None):
+    max_pages = max_pages or RESUME_MAX_PAGES or None
+    max_chars = max_chars or RESUME_MAX_CHARS or None
     p = Path(path)
     suffix = p.suffix.lower()
     if suffix == ".pdf":
-        return extract_text_from_pdf(str(p))
+        return extract_text_from_pdf(str(p), max_pages=max_pages, max_chars=max_chars)
     elif suffix in [".doc", ".docx"]:
-        return extract_text_from_docx(str(p))
+        return extract_text_from_docx(str(p), max_chars=max_chars)
     else:
-        return p.read_text(encoding="utf-8", errors="ignore")
+        with open(p, encoding="utf-8", errors="ignore") as f:
+            return f.read(max_chars) if max_chars else f.read()
 
 # -------------------------------
 # CONTACT INFORMATION EXTRACTION
 # -------------------------------
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(\+?\d[\d\-\s]{8,15})")
+LINKEDIN_RE = re.compile(r"(https?://)?(www\.)?linkedin\.com/[A-Za-z0-9_/.-]+")
+
 def extract_email(text):
-    m = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
+    m = EMAIL_RE.search(text)
     return m.group(0) if m else None
 
 def extract_phone(text):
-    m = re.search(r"(\+?\d[\d\-\s]{8,15})", text)
+    m = PHONE_RE.search(text)
     return m.group(0) if m else None
 
 def extract_linkedin(text):
-    m = re.search(r"(https?://)?(www\.)?linkedin\.com/[A-Za-z0-9_/.-]+", text)
+    m = LINKEDIN_RE.search(text)
     return m.group(0) if m else None
 
 def extract_name(text):
@@ -55,92 +128,156 @@ def extract_name(text):
 # -------------------------------
 # SKILL EXTRACTION
 # -------------------------------
-COMMON_SKILLS = [
-    "python","java","c++","c#","sql","pandas","numpy","tensorflow",
-    "pytorch","scikit-learn","machine learning","deep learning",
-    "react","node","aws","azure","docker","kubernetes","excel",
-    "nlp","computer vision","javascript","html","css"
-]
-
-def extract_skills(text):
-    t = text.lower()
-    
-    found = set()
-
-    # global skill search
-    for s in COMMON_SKILLS:
-        if s in t:
-            found.add(s)
+# The skill vocabulary (with aliases) lives in app/skills_taxonomy.json or
+# SKILL_TAXONOMY_PATH and is matched in a single pass, see app/skills.py.
+SKILLS_BLOCK_RE = re.compile(r"(skills|technical skills)[:\n](.*?)(\n[A-Z][a-z]+:|\Z)", re.S | re.I)
+# "-" only separates as a bullet / spaced dash, so "scikit-learn" stays whole
+SKILL_SPLIT_RE = re.compile(r"[,\n/;•]|(?:^|\s)-(?:\s|$)", re.M)
+
+# skills_block: the text of the resume's skills section if the caller has
+# already segmented it (parse_resume_sections does); otherwise it is located
+# with SKILLS_BLOCK_RE.
+def extract_skills(text, skills_block=None):
+    matcher = get_skill_matcher()
+    found = matcher.find(text)
 
     # section-based skill search
-    m = re.search(r"(skills|technical skills)[:\n](.*?)(\n[A-Z][a-z]+:|\Z)",
-                  text, re.S | re.I)
+    if skills_block is None:
+        m = SKILLS_BLOCK_RE.search(text)
+        skills_block = m.group(2) if m else ""
 
-    if m:
-        skills_block = m.group(2)
-        for part in re.split(r"[,\n/;•\-]", skills_block):
-            clean = part.strip().lower()
-            if clean:
-                found.add(clean)
+    for part in SKILL_SPLIT_RE.split(skills_block):
+        clean = " ".join(part.lower().split())
+        if clean:
+            found.add(matcher.canonical.get(clean, clean))
 
-    return list(found)[:50]
+    # sorted so the same resume always yields the same search_text (and cache key)
+    return sorted(found)[:50]
 
 # -------------------------------
 # EXPERIENCE CALCULATION
 # -------------------------------
+YEAR_RANGE_RE = re.compile(r"(19|20)\d{2}\s*(?:-|–|—|to)\s*(present|19\d{2}|20\d{2})")
+SINCE_YEAR_RE = re.compile(r"(since|from)\s*(19|20)\d{2}")
+
 def estimate_years_experience(text):
     years = []
     text = text.lower()
+    this_year = datetime.now().year
 
     # pattern: 2018–2022
-    for m in re.finditer(r"(19|20)\d{2}\s*(?:-|–|—|to)\s*(present|19\d{2}|20\d{2})", text):
+    for m in YEAR_RANGE_RE.finditer(text):
         start = int(m.group(0)[:4])
         end_token = m.group(2)
-        end = datetime.now().year if "present" in end_token else int(end_token)
+        end = this_year if "present" in end_token else int(end_token)
         years.append(max(0, end - start))
 
     # pattern: since 2018
-    for m in re.finditer(r"(since|from)\s*(19|20)\d{2}", text):
+    for m in SINCE_YEAR_RE.finditer(text):
         start = int(m.group(0)[-4:])
-        years.append(datetime.now().year - start)
+        years.append(this_year - start)
 
     return sum(years) if years else 0
 
+# -------------------------------
+# SECTION SEGMENTATION
+# -------------------------------
+# Header vocabulary: section -> header phrases (case-insensitive). A header
+# is a line consisting of the phrase, optionally followed by ":" and inline
+# content ("Skills: python, sql").
+SECTION_HEADERS = {
+    "experience": ["experience", "work experience", "employment history",
+                   "professional experience", "work history"],
+    "education": ["education", "academic qualifications", "academic qualification", "qualifications"],
+    "skills": ["skills", "technical skills"],
+    "projects": ["projects", "academic projects"],
+    "summary": ["summary", "profile", "objective"],
+    "certifications": ["certifications", "certificates"],
+}
+
+# an unlisted "Heading:" line still closes the current section, except in
+# these, where such lines are sub-headings of an entry ("Responsibilities:",
+# "Tools:") and only a SECTION_HEADERS header ends the section
+GENERIC_HEADER_RE = re.compile(r"^[A-Z][A-Za-z ]{0,30}:$")
+SUBHEADED_SECTIONS = frozenset({"experience", "projects"})
+
+
+class SectionSegmenter:
+    def __init__(self, headers=None):
+        headers = headers or SECTION_HEADERS
+        self.section_of = {}
+        for section, phrases in headers.items():
+            for phrase in phrases:
+                self.section_of[" ".join(phrase.lower().split())] = section
+        alternatives = "|".join(
+            r"\s+".join(map(re.escape, phrase.split()))
+            for phrase in sorted(self.section_of, key=len, reverse=True)
+        )
+        self.header_re = re.compile(rf"^(?P<header>{alternatives})\s*(?::\s*(?P<rest>.*))?$", re.I)
+
+    def scan(self, lines):
+        # one pass over stripped, non-empty lines: returns ({section: text},
+        # {"email", "phone", "linkedin"}); the first occurrence of a section wins
+        sections = {}
+        contacts = {"email": None, "phone": None, "linkedin": None}
+        current = None
+        buf = []
+
+        def close():
+            if current and current not in sections:
+                sections[current] = "\n".join(buf).strip()
+
+        for line in lines:
+            m = self.header_re.match(line)
+            if m:
+                close()
+                current = self.section_of[" ".join(m.group("header").lower().split())]
+                buf = [m.group("rest")] if m.group("rest") else []
+            elif current not in SUBHEADED_SECTIONS and GENERIC_HEADER_RE.match(line):
+                close()
+                current, buf = None, []
+            elif current:
+                buf.append(line)
+
+            if contacts["email"] is None:
+                e = EMAIL_RE.search(line)
+                contacts["email"] = e.group(0) if e else None
+            if contacts["phone"] is None:
+                p = PHONE_RE.search(line)
+                contacts["phone"] = p.group(0) if p else None
+            if contacts["linkedin"] is None:
+                li = LINKEDIN_RE.search(line)
+                contacts["linkedin"] = li.group(0) if li else None
+        close()
+
+        return sections, contacts
+
+
+_default_segmenter = SectionSegmenter()
+
 # -------------------------------
 # MAIN PARSER
 # -------------------------------
-def parse_resume_sections(text):
+# headers: optional {section: [header phrases]} replacing SECTION_HEADERS
+def parse_resume_sections(text, headers=None):
     lines = [l.strip() for l in text.splitlines() if l.strip()]
     full_text = "\n".join(lines)
 
+    segmenter = SectionSegmenter(headers) if headers else _default_segmenter
+    sections, contacts = segmenter.scan(lines)
+
     # Extract structured fields
-    skills = extract_skills(full_text)
+    skills = extract_skills(full_text, skills_block=sections.get("skills", ""))
     years_exp = estimate_years_experience(full_text)
 
-    # extract experience section
-    exp_section = ""
-    exp_m = re.search(
-        r"(experience|work experience|employment history)[:\n](.*?)(\neducation[:\n]|\nprojects[:\n]|\Z)",
-        full_text, re.S | re.I)
-    if exp_m:
-        exp_section = exp_m.group(2).strip()
-
-    # extract education section
-    edu_section = ""
-    edu_m = re.search(
-        r"(education|academic qualifications)[:\n](.*?)(\n[A-Z][a-z]+:|\Z)",
-        full_text, re.S | re.I)
-    if edu_m:
-        edu_section = edu_m.group(2).strip()
-
     return {
         "full_text": full_text,
         "name": extract_name(full_text),
-        "email": extract_email(full_text),
-        "phone": extract_phone(full_text),
-        "linkedin": extract_linkedin(full_text),
+        "email": contacts["email"],
+        "phone": contacts["phone"],
+        "linkedin": contacts["linkedin"],
         "skills": skills,
-        "experience": exp_section,
-        "education": edu_section,
+        "experience": sections.get("experience", ""),
+        "education": sections.get("education", ""),
         "years_experience": years_exp
     }
@@ -1,124 +1,603 @@
 # app/search.py
 
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import faiss
 from pathlib import Path
-import pickle
 from typing import List
 
-INDEX_PATH = Path("faiss_index/index.faiss")
-META_PATH = Path("faiss_index/meta.pkl")
+from app import metrics
+from app.chunking import CHUNK_AGG, CHUNK_AGG_TOP_N, CHUNK_OVERSAMPLE, CHUNK_STRIDE, aggregate, chunk_ids
+from app.filters import id_bitmap
+from app.skills import canonical_skills
+from app.metastore import MetaStore, merge_metastore, write_metastore
+from app.sparse import SparseIndex, merge_sparse, write_sparse
+from app.index_factory import (
+    INDEX_TYPE, NPROBE, EF_SEARCH, EXHAUSTIVE_KINDS, add_vectors, build_index, index_kind,
+    remove_ids as remove_index_ids, search_params
+)
+
+# Every write produces a new generation directory (index.faiss, meta/ and
+# sparse/) under generations/, published by atomically replacing the CURRENT
+# pointer file. Readers resolve CURRENT first, so they always see one
+# complete generation, never a half-written index/metadata pair.
+INDEX_ROOT = Path("faiss_index")
+GENERATIONS_PATH = INDEX_ROOT / "generations"
+CURRENT_PATH = INDEX_ROOT / "CURRENT"
+# older generations kept on disk (for searches still reading them)
+GENERATIONS_KEEP = max(1, int(os.getenv("INDEX_GENERATIONS_KEEP", "2")))
+# build manifest (app.utils) of a generation, swapped in with it
+MANIFEST_NAME = "manifest.json"
+# {"added_since_train": n} for index_factory.add_vectors' retraining
+INDEX_STATE_NAME = "index.json"
+# a temp build directory whose process is gone, or older than this, is removed
+BUILD_TMP_MAX_AGE = float(os.getenv("INDEX_BUILD_TMP_MAX_AGE", str(24 * 3600)))
+# BM25 index over full text for hybrid retrieval (SPARSE_INDEX=0 skips it)
+SPARSE_INDEX = os.getenv("SPARSE_INDEX", "1") != "0"
+# pre-generation layout directly under faiss_index/ (index.faiss + meta/);
+# still read, removed on the next write. The pre-columnar meta.pkl is not
+# read (such an index needs a full rebuild); it is only deleted.
+INDEX_PATH = INDEX_ROOT / "index.faiss"
+META_PATH = INDEX_ROOT / "meta"
+SPARSE_PATH = INDEX_ROOT / "sparse"
+LEGACY_META_PATH = INDEX_ROOT / "meta.pkl"
 
 # Dimension for sentence-transformers "all-MiniLM-L6-v2"
 DIM = 384
 
+# Process-wide handle on the loaded index. It is reused until the files on
+# disk change (keyed on mtime/size), so queries don't pay for read_index and
+# unpickling the metadata every time.
+_cache_lock = threading.Lock()
+_cache = {"key": None, "index": None, "metas": [], "sparse": None, "generation": 0}
+
 
 # ========================================
 # Create FAISS index
 # ========================================
-def create_index(embeddings: List[List[float]], metas: List[dict]):
-    arr = np.array(embeddings).astype("float32")
+# Vectors are stored under stable integer ids so that the incremental
+# builder can remove or replace single resumes in place. The index type
+# (flat / fp16 / sq8 / pq / ivf / ivfpq / hnsw) comes from INDEX_TYPE, see
+# index_factory.
+# Metadata lives in a columnar MetaStore keyed by the same ids. With
+# chunk-level embeddings (app.chunking) the index holds several vectors per
+# resume under vector_ids derived from the resume ids. The BM25 index
+# (app.sparse) is rebuilt from the same records on every write.
+def _as_vectors(embeddings):
+    # A C-contiguous float32 matrix (e.g. from embed_array / VectorBuffer) is
+    # used as-is, lists are converted; rows are L2-normalized in place.
+    arr = np.ascontiguousarray(embeddings, dtype="float32").reshape(-1, DIM)
     faiss.normalize_L2(arr)
+    return arr
+
+
+def _paths(root):
+    # (index file, metadata store, BM25 index) of one generation
+    return root / "index.faiss", root / "meta", root / "sparse"
+
+
+def _write_index(index, records, chunk_stride=0, manifest=None, base=None, base_sparse=None, exclude=(),
+                 added_since_train=0):
+    # records: iterable of (id, meta dict). With base (the MetaStore being
+    # updated, and its BM25 index) they are merged into a copy of its rows
+    # minus `exclude`, so only the new records are encoded and tokenized.
+    # Everything, including the build manifest, is written to a temporary
+    # directory that becomes the new generation when complete.
+    GENERATIONS_PATH.mkdir(parents=True, exist_ok=True)
+    remove_orphaned_builds()
+    tmp = Path(tempfile.mkdtemp(prefix=f".tmp-{os.getpid()}-", dir=GENERATIONS_PATH))
+    try:
+        index_path, meta_path, sparse_path = _paths(tmp)
+        faiss.write_index(index, str(index_path))
+        (tmp / INDEX_STATE_NAME).write_text(json.dumps({"added_since_train": added_since_train}), encoding="utf-8")
+
+        # sparse rows follow the metadata store's row order (sorted by id)
+        records = sorted(records, key=lambda r: r[0])
+        texts = (m.get("full_text", "") for _, m in records)
+        if base is None:
+            if SPARSE_INDEX:
+                write_sparse(sparse_path, texts)
+            write_metastore(meta_path, records, chunk_stride=chunk_stride)
+        else:
+            rows, new_rows = merge_metastore(meta_path, base, records, exclude, chunk_stride=chunk_stride)
+            if SPARSE_INDEX and base_sparse is not None:
+                merge_sparse(sparse_path, base_sparse, rows, texts, new_rows)
+            elif SPARSE_INDEX:
+                # nothing to extend (built with SPARSE_INDEX=0): index every row
+                merged = MetaStore(meta_path)
+                write_sparse(sparse_path, (merged.full_text(r) for r in range(len(merged))))
+        if manifest is not None:
+            (tmp / MANIFEST_NAME).write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+
+        name = f"g{time.time_ns()}-{os.getpid()}"
+        os.rename(tmp, GENERATIONS_PATH / name)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    _publish(name)
+    _remove_stale(name)
+
+    # the freshly written objects become the resident copy
+    metas = MetaStore(_paths(GENERATIONS_PATH / name)[1])
+    with _cache_lock:
+        _set_cache(name, GENERATIONS_PATH / name, index, metas)
+
+
+def _publish(name):
+    tmp = CURRENT_PATH.with_name(f"CURRENT.{os.getpid()}.tmp")
+    tmp.write_text(name + "\n", encoding="utf-8")
+    os.replace(tmp, CURRENT_PATH)
+
+
+def _remove_stale(current):
+    # legacy files and all but the newest GENERATIONS_KEEP generations;
+    # searches still holding an older one keep their open/mapped files
+    for path in (INDEX_PATH, LEGACY_META_PATH, INDEX_ROOT / MANIFEST_NAME):
+        if path.exists():
+            path.unlink()
+    for path in (META_PATH, SPARSE_PATH):
+        shutil.rmtree(path, ignore_errors=True)
+
+    names = sorted((p.name for p in GENERATIONS_PATH.iterdir() if p.name.startswith("g")),
+                   key=lambda n: int(n[1:].split("-")[0]))
+    for name in names[:-GENERATIONS_KEEP]:
+        if name != current:
+            shutil.rmtree(GENERATIONS_PATH / name, ignore_errors=True)
+
+
+def remove_orphaned_builds():
+    # .tmp-<pid>-* directories left by killed or crashed builds
+    if not GENERATIONS_PATH.exists():
+        return
+    now = time.time()
+    for path in GENERATIONS_PATH.glob(".tmp-*"):
+        pid = path.name.split("-")[1]
+        try:
+            expired = now - path.stat().st_mtime > BUILD_TMP_MAX_AGE
+        except FileNotFoundError:
+            continue
+        if expired or not _pid_alive(pid):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _pid_alive(pid):
+    if not pid.isdigit():
+        return False  # pre-pid temp name
+    if int(pid) == os.getpid() or os.name == "nt":
+        return True  # (os.kill would terminate it on Windows) age decides
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, owned by another user
+    return True
 
-    index = faiss.IndexFlatIP(DIM)
-    index.add(arr)
 
-    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, str(INDEX_PATH))
+def create_index(embeddings: List[List[float]], metas: List[dict], ids: List[int] = None, kind: str = None,
+                 vector_ids: List[int] = None, manifest: dict = None):
+    # vector_ids: one per embedding for a chunk-level index (metas then
+    # carry their chunk count under "chunks"); None -> one vector per resume.
+    # manifest is stored with the generation (see manifest_path).
+    if ids is None:
+        ids = list(range(len(metas)))
 
-    with open(META_PATH, "wb") as f:
-        pickle.dump(metas, f)
+    chunked = vector_ids is not None
+    index = build_index(_as_vectors(embeddings), vector_ids if chunked else ids, kind or INDEX_TYPE)
+
+    _write_index(index, zip(ids, metas), chunk_stride=CHUNK_STRIDE if chunked else 0, manifest=manifest)
+
+
+# ========================================
+# Update FAISS index in place
+# ========================================
+def update_index(embeddings: List[List[float]], metas: List[dict], ids: List[int], remove_ids: List[int] = (),
+                 vector_ids: List[int] = None, manifest: dict = None):
+    index, existing, sparse = _load()
+    if index is None:
+        raise ValueError("No ID-mapped index to update; run a full rebuild first.")
+    stride = existing.chunk_stride
+    if bool(stride) != (vector_ids is not None):
+        raise ValueError("Index granularity differs from the update; run a full rebuild first.")
+
+    # the cached index may be in use by concurrent searches
+    index = faiss.clone_index(index)
+
+    # replaced ids are removed first, then re-added with their new vector
+    stale = sorted(set(remove_ids) | set(ids))
+    if stale and stride:
+        rows = existing.rows_for(stale)
+        known = rows >= 0
+        stale_vectors = chunk_ids(np.array(stale)[known], existing.chunk_counts[rows[known]], stride)
+    else:
+        stale_vectors = stale
+    if len(stale_vectors):
+        index = remove_index_ids(index, stale_vectors)
+
+    # a small corpus starts out flat and becomes INDEX_TYPE once it is big
+    # enough; trained kinds are retrained when the update drifts from their
+    # training (index_factory.add_vectors)
+    index, added = add_vectors(index, _as_vectors(embeddings), vector_ids if stride else ids,
+                               _index_state().get("added_since_train", 0), INDEX_TYPE)
+
+    _write_index(index, zip(ids, metas), chunk_stride=stride, manifest=manifest, base=existing, base_sparse=sparse,
+                 exclude=stale, added_since_train=added)
 
 
 # ========================================
 # Load FAISS index + meta data
 # ========================================
-def load_index():
-    if not INDEX_PATH.exists() or not META_PATH.exists():
-        return None, []
+def _current():
+    # (cache key, directory) of the published index, (None, None) if none
+    try:
+        name = CURRENT_PATH.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        name = ""
+    if name:
+        return name, GENERATIONS_PATH / name
+
+    # legacy layout, keyed on file stats
+    try:
+        i = INDEX_PATH.stat()
+        m = (META_PATH / "meta.json").stat()
+    except FileNotFoundError:
+        return None, None
+    return (i.st_mtime_ns, i.st_size, m.st_mtime_ns, m.st_size), INDEX_ROOT
+
+
+def index_files():
+    # (index file, metadata store, BM25 index) paths of the published index
+    _, root = _current()
+    return _paths(root or INDEX_ROOT)
 
-    index = faiss.read_index(str(INDEX_PATH))
-    metas = pickle.load(open(META_PATH, "rb"))
 
+def manifest_path():
+    # build manifest of the published index (faiss_index/manifest.json for
+    # the legacy layout)
+    _, root = _current()
+    return (root or INDEX_ROOT) / MANIFEST_NAME
+
+
+def _index_state():
+    # {} for indexes written before the state file existed
+    _, root = _current()
+    path = (root or INDEX_ROOT) / INDEX_STATE_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _open_sparse(path, metas):
+    # None when missing or out of step with the metadata store
+    if not SparseIndex.exists(path):
+        return None
+    sparse = SparseIndex(path)
+    return sparse if len(sparse) == len(metas) else None
+
+
+def _set_cache(key, root, index, metas):
+    _cache.update(key=key, index=index, metas=metas, sparse=_open_sparse(_paths(root)[2], metas),
+                  generation=_cache["generation"] + 1)
+
+
+def _load(force=False):
+    key, root = _current()
+    if key is None:
+        return None, [], None
+
+    with _cache_lock:
+        if force or _cache["key"] != key:
+            with metrics.span("load_index"):
+                index_path, meta_path, _ = _paths(root)
+                index = faiss.read_index(str(index_path))
+                metas = MetaStore(meta_path)
+                _set_cache(key, root, index, metas)
+
+        return _cache["index"], _cache["metas"], _cache["sparse"]
+
+
+def load_index(force=False):
+    index, metas, _ = _load(force)
     return index, metas
 
 
+def index_generation():
+    # bumps every time a different index is loaded or written
+    load_index()
+    return _cache["generation"]
+
+
+def clear_index_cache():
+    with _cache_lock:
+        _cache.update(key=None, index=None, metas=[], sparse=None)
+
+
 # ========================================
 # Skill Matching Score
 # ========================================
-def _skill_overlap_score(query_skills, resume_skills):
-    if not query_skills:
-        return 0.0
+# Vectorized over a pool of metadata rows: the CSR segments of those rows
+# are gathered in one go and compared against the query's skill codes.
+def _csr_positions(indptr, rows):
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return starts[owner] + offsets, owner
+
 
-    q = set(s.lower() for s in query_skills)
-    r = set(s.lower() for s in resume_skills)
+def _skill_overlap_scores(metas, rows, query_skills):
+    q = set(canonical_skills(query_skills))
+    if not q or not len(rows):
+        return np.zeros(len(rows), dtype="float32")
 
-    if not r:
-        return 0.0
+    codes = metas.skill_codes_for(q)
+    if not len(codes):
+        return np.zeros(len(rows), dtype="float32")
 
-    overlap = len(q & r)
-    return overlap / max(len(q), 1)
+    positions, owner = _csr_positions(metas.skill_indptr, rows)
+    hits = np.isin(metas.skill_codes[positions], codes)
+    overlap = np.bincount(owner[hits], minlength=len(rows))
+    return (overlap / len(q)).astype("float32")
 
 
 # ========================================
 # Experience Score
 # ========================================
-def _experience_score(query_years, resume_years):
+def _experience_scores(query_years, resume_years):
     if query_years <= 0:
-        return 0.0
+        return np.zeros(len(resume_years), dtype="float32")
 
-    return min(resume_years / query_years, 1.0)
+    return np.minimum(resume_years / query_years, 1.0).astype("float32")
 
 
 # ========================================
-# Search Function
+# Hybrid (BM25 + dense) Fusion
 # ========================================
-def search(query_embedding, k=5, query_skills=None, query_years=0):
-    index, metas = load_index()
-    if index is None:
-        return []
+# With a query text, the BM25 top hits are merged with the dense pool and
+# the two rankings are fused into one retrieval score that takes the
+# embedding score's place in the composite:
+#   rrf       reciprocal rank fusion, 1 / (RRF_K + rank) per list, scaled
+#             so that rank 1 in both lists gives 1.0
+#   weighted  HYBRID_ALPHA * embed + (1 - HYBRID_ALPHA) * bm25 / best bm25
+# Candidates found only by BM25 have an embed score of 0.
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "rrf")
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.7"))
+RRF_K = 60
+
+# BM25 queries run here while FAISS searches (both release the GIL)
+_sparse_executor = ThreadPoolExecutor(max_workers=int(os.getenv("SPARSE_WORKERS", "4")),
+                                      thread_name_prefix="bm25")
+
+
+def _fuse(dense_scores, dense_ids, bm25_scores, bm25_ids, fusion):
+    # both lists best first; returns (ids, embed, bm25, fused) over their union
+    valid = dense_ids >= 0
+    dense_scores, dense_ids = dense_scores[valid], dense_ids[valid]
+    nd, ns = len(dense_ids), len(bm25_ids)
+    ids, inverse = np.unique(np.concatenate([dense_ids, bm25_ids]), return_inverse=True)
+    d_pos, s_pos = inverse[:nd], inverse[nd:]
+
+    embed = np.zeros(len(ids), dtype="float32")
+    embed[d_pos] = dense_scores
+    bm25 = np.zeros(len(ids), dtype="float32")
+    bm25[s_pos] = bm25_scores
+
+    if fusion == "rrf":
+        fused = np.zeros(len(ids), dtype="float32")
+        fused[d_pos] += 1 / (RRF_K + 1 + np.arange(nd))
+        fused[s_pos] += 1 / (RRF_K + 1 + np.arange(ns))
+        fused *= (RRF_K + 1) / 2
+    elif fusion == "weighted":
+        best = bm25.max() if ns else 0
+        fused = HYBRID_ALPHA * embed + (1 - HYBRID_ALPHA) * (bm25 / best if best > 0 else bm25)
+    else:
+        raise ValueError(f"Unknown fusion {fusion!r}; expected 'rrf' or 'weighted'")
+
+    order = np.argsort(-fused, kind="stable")
+    return ids[order], embed[order], bm25[order], fused[order].astype("float32")
 
-    q = np.array([query_embedding]).astype("float32")
-    faiss.normalize_L2(q)
 
-    D, I = index.search(q, k)
-    results = []
+# ========================================
+# Composite Re-ranking
+# ========================================
+# Number of nearest neighbours fetched per requested result. The composite
+# score can promote a candidate with strong skill/experience match from
+# well below the embedding top-k, so we rank a wider pool.
+RERANK_OVERSAMPLE = int(os.getenv("RERANK_OVERSAMPLE", "20"))
+
+
+def _pool_size(index, k, oversample):
+    return max(1, min(index.ntotal, k * max(1, oversample)))
 
-    for score, idx in zip(D[0], I[0]):
-        if idx == -1:
-            continue
 
-        meta = metas[idx].copy()
-        embed_score = float(score)
+def _rerank(metas, scores, ids, k, query_skills=None, query_years=0, bm25=None, retrieval=None):
+    # bm25 / retrieval (fused score) are aligned with ids for hybrid queries;
+    # retrieval then replaces the embedding score in the composite
+    rows = metas.rows_for(ids)
+    keep = (ids != -1) & (rows >= 0)
+    rows = rows[keep]
+    embed = scores[keep].astype("float32")
+    hybrid = retrieval is not None
+    if hybrid:
+        bm25, retrieval = bm25[keep], retrieval[keep]
+    else:
+        retrieval = embed
 
-        skill_score = _skill_overlap_score(
-            query_skills or [],
-            meta.get("skills", [])
-        )
+    skill = _skill_overlap_scores(metas, rows, query_skills)
+    exp = _experience_scores(query_years, metas.years[rows])
+    richness = metas.skill_counts[rows] / 20  # bonus for having more skills
 
-        exp_score = _experience_score(
-            query_years,
-            meta.get("years_experience", 0)
-        )
+    # Composite Ranking Score
+    composite = 0.55 * retrieval + 0.25 * skill + 0.15 * exp + 0.05 * richness
 
-        # Composite Ranking Score
-        composite = (
-            0.55 * embed_score +
-            0.25 * skill_score +
-            0.15 * exp_score +
-            0.05 * (len(meta.get("skills", [])) / 20)  # bonus for having more skills
-        )
+    # highest first; stable so ties keep embedding order
+    top = np.argsort(-composite, kind="stable")[:k]
 
+    results = []
+    for i in top:
+        meta = metas.record(rows[i])
         meta.update({
-            "embed_score": embed_score,
-            "skill_score": skill_score,
-            "exp_score": exp_score,
-            "composite_score": composite
+            "embed_score": float(embed[i]),
+            "skill_score": float(skill[i]),
+            "exp_score": float(exp[i]),
+            "composite_score": float(composite[i])
         })
-
+        if hybrid:
+            meta["bm25_score"] = float(bm25[i])
+            meta["retrieval_score"] = float(retrieval[i])
         results.append(meta)
+    return results
+
+
+# ========================================
+# Filtered Search
+# ========================================
+# Hard filters (app.filters.ResumeFilter) are resolved to the eligible ids
+# up front and passed to FAISS as an ID selector, so the whole pool is
+# spent on eligible resumes. With IVF / HNSW a selective filter can leave
+# the probed lists / visited neighbourhood short of eligible vectors; those
+# queries are retried with a wider nprobe / efSearch until they have k hits
+# or the search is exhaustive. Small eligible sets in an index with an id
+# map (all but ivf / ivfpq) are scored directly from their stored vectors.
+FILTER_EXACT_MAX = int(os.getenv("FILTER_EXACT_MAX", "4096"))
+
+
+def _exact_search(index, q, ids, pool):
+    vectors = index.reconstruct_batch(ids)
+    scores = q @ vectors.T
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :pool]
+    return np.take_along_axis(scores, top, axis=1), ids[top]
+
+
+def _hit_counts(I, stride):
+    # results per query; distinct resumes for a chunk-level index
+    if not stride:
+        return (I >= 0).sum(axis=1)
+    return np.array([len(np.unique(row[row >= 0] // stride)) for row in I])
+
+
+def _id_selector(ids):
+    # (selector, bitmap it reads from); the bitmap must outlive the searches.
+    # Sparse id sets go to IDSelectorBatch, sized by the number of ids.
+    bitmap = id_bitmap(ids)
+    if bitmap is None:
+        return faiss.IDSelectorBatch(np.ascontiguousarray(ids, dtype="int64")), None
+    return faiss.IDSelectorBitmap(bitmap), bitmap
+
+
+def _filtered_search(index, q, pool, need, eligible, nprobe=None, ef_search=None, stride=0):
+    nprobe, ef_search = nprobe or NPROBE, ef_search or EF_SEARCH
+    kind = index_kind(index)
+    if kind not in ("ivf", "ivfpq") and len(eligible) <= FILTER_EXACT_MAX:
+        return _exact_search(index, q, eligible, pool)
+
+    sel, bitmap = _id_selector(eligible)  # bitmap is held for the searches below
+    D, I = index.search(q, pool, params=search_params(index, nprobe=nprobe, ef_search=ef_search, sel=sel))
+    if kind in EXHAUSTIVE_KINDS:
+        return D, I
+
+    nlist = faiss.extract_index_ivf(index).nlist if kind in ("ivf", "ivfpq") else 0
+    while True:
+        short = np.flatnonzero(_hit_counts(I, stride) < need)
+        if not len(short):
+            break
+        if nlist:
+            if nprobe >= nlist:
+                break
+            nprobe = min(nprobe * 4, nlist)
+        else:
+            if ef_search >= index.ntotal:
+                break
+            ef_search = min(ef_search * 4, index.ntotal)
+        params = search_params(index, nprobe=nprobe, ef_search=ef_search, sel=sel)
+        D[short], I[short] = index.search(q[short], pool, params=params)
+    return D, I
 
-    # Sort by composite score (highest first)
-    results = sorted(results, key=lambda x: x["composite_score"], reverse=True)
 
+# ========================================
+# Search Function
+# ========================================
+# nprobe (IVF) / ef_search (HNSW) trade recall for latency; None uses the
+# INDEX_NPROBE / INDEX_EF_SEARCH defaults. oversample=None uses
+# RERANK_OVERSAMPLE. filters is an optional ResumeFilter; only resumes
+# matching it are returned. chunk_agg ("max" / "mean", default CHUNK_AGG)
+# applies to chunk-level indexes. query_text (the JD) turns on hybrid
+# BM25 + dense retrieval, fused per `fusion` (default HYBRID_FUSION).
+def search(query_embedding, k=5, query_skills=None, query_years=0, nprobe=None, ef_search=None,
+           oversample=None, filters=None, chunk_agg=None, query_text=None, fusion=None):
+    return search_batch([query_embedding], k=k, query_skills=[query_skills], query_years=[query_years],
+                        nprobe=nprobe, ef_search=ef_search, oversample=oversample, filters=filters,
+                        chunk_agg=chunk_agg, query_texts=None if query_text is None else [query_text],
+                        fusion=fusion)[0]
+
+
+# One index.search over the whole query matrix, then per-query re-ranking.
+# query_skills / query_years / query_texts are per-query lists (None -> no
+# preference / dense only); filters applies to every query.
+def search_batch(query_embeddings, k=5, query_skills=None, query_years=None, nprobe=None, ef_search=None,
+                 oversample=None, filters=None, chunk_agg=None, query_texts=None, fusion=None):
+    with metrics.span("search", queries=len(query_embeddings), k=k):
+        return _search_batch(query_embeddings, k, query_skills, query_years, nprobe, ef_search, oversample,
+                             filters, chunk_agg, query_texts, fusion)
+
+
+def _sparse_search(sparse, query_text, pool, mask):
+    with metrics.span("search.sparse"):
+        return sparse.search(query_text, pool, mask)
+
+
+def _search_batch(query_embeddings, k, query_skills, query_years, nprobe, ef_search, oversample,
+                  filters, chunk_agg, query_texts, fusion):
+    n = len(query_embeddings)
+    index, metas, sparse = _load()
+    if index is None or not index.ntotal:
+        return [[] for _ in range(n)]
+
+    q = np.array(query_embeddings, dtype="float32").reshape(n, -1)
+    faiss.normalize_L2(q)
+
+    pool = _pool_size(index, k, RERANK_OVERSAMPLE if oversample is None else oversample)
+    stride = metas.chunk_stride
+    # a chunk-level index needs several chunk hits per resume in the pool
+    fetch = min(index.ntotal, pool * CHUNK_OVERSAMPLE) if stride else pool
+    mask = filters.mask(metas) if filters else None
+    if mask is not None and not mask.any():
+        return [[] for _ in range(n)]
+
+    sparse_jobs = [None] * n
+    if query_texts is not None and sparse is not None:
+        sparse_jobs = [_sparse_executor.submit(_sparse_search, sparse, t, pool, mask) if t else None
+                       for t in query_texts]
+
+    with metrics.span("search.dense", filtered=mask is not None):
+        if mask is not None:
+            eligible = chunk_ids(metas.ids[mask], metas.chunk_counts[mask], stride) if stride else metas.ids[mask]
+            need = min(k, int(mask.sum()))
+            D, I = _filtered_search(index, q, min(fetch, len(eligible)), need, eligible, nprobe, ef_search,
+                                    stride)
+        else:
+            D, I = index.search(q, fetch, params=search_params(index, nprobe=nprobe, ef_search=ef_search))
+
+    query_skills = query_skills or [None] * n
+    query_years = query_years or [0] * n
+    top_n = 1 if (chunk_agg or CHUNK_AGG) == "max" else CHUNK_AGG_TOP_N
+    results = []
+    # includes waiting for the BM25 side and fusing
+    with metrics.span("search.rerank"):
+        for i in range(n):
+            scores, ids = aggregate(D[i], I[i], stride, top_n) if stride else (D[i], I[i])
+            bm25 = retrieval = None
+            if sparse_jobs[i] is not None:
+                bm25_scores, bm25_rows = sparse_jobs[i].result()
+                ids, scores, bm25, retrieval = _fuse(scores, ids, bm25_scores, metas.ids[bm25_rows],
+                                                     fusion or HYBRID_FUSION)
+            results.append(_rerank(metas, scores, ids, k, query_skills[i], query_years[i] or 0,
+                                   bm25=bm25, retrieval=retrieval))
     return results
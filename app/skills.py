@@ -0,0 +1,122 @@
+# app/skills.py
+#
+# Skill vocabulary matching. The taxonomy (canonical skill -> aliases) is
+# compiled into one trie-shaped regex, so a resume is scanned once no matter
+# how many skills and aliases there are. Matches respect word boundaries:
+# "java" does not match inside "javascript", "c" not inside "c++".
+#
+# Taxonomy file: JSON or YAML mapping {"scikit-learn": ["sklearn", ...], ...}
+# (a plain list of skills is accepted too). SKILL_TAXONOMY_PATH overrides the
+# bundled skills_taxonomy.json.
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH", str(Path(__file__).with_name("skills_taxonomy.json"))
+)
+
+# characters that continue a "word" for boundary purposes (c++, c#, .net)
+_WORD_CHARS = r"\w+#"
+
+
+# -------------------------------
+# TAXONOMY
+# -------------------------------
+def _normalize(term):
+    return " ".join(str(term).lower().split())
+
+
+def load_taxonomy(path=None):
+    path = Path(path or SKILL_TAXONOMY_PATH)
+    raw = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yml", ".yaml"):
+        import yaml
+        data = yaml.safe_load(raw)
+    else:
+        data = json.loads(raw)
+
+    if isinstance(data, list):
+        data = {s: [] for s in data}
+    return {_normalize(skill): [_normalize(a) for a in (aliases or [])] for skill, aliases in data.items()}
+
+
+# -------------------------------
+# TRIE REGEX
+# -------------------------------
+def _trie_pattern(node):
+    # node: {char: child, "": True if a term ends here}
+    terminal = "" in node
+    branches = []
+    for ch in sorted(k for k in node if k):
+        piece = r"\s+" if ch == " " else re.escape(ch)
+        branches.append(piece + _trie_pattern(node[ch]))
+
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        # alternatives are tried longest-first because the group is greedy
+        return "(?:" + body + ")?"
+    return body
+
+
+def compile_terms(terms, flags=0):
+    # one regex matching any of `terms` (lowercase) as a whole word; pass
+    # re.IGNORECASE to match mixed-case text without lowering it
+    trie = {}
+    for term in terms:
+        if not term:
+            continue
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    if not trie:
+        return None
+    return re.compile(rf"(?<![{_WORD_CHARS}])(?:{_trie_pattern(trie)})(?![{_WORD_CHARS}])", flags)
+
+
+class SkillMatcher:
+    def __init__(self, taxonomy):
+        self.skills = sorted(taxonomy)
+        self.canonical = {}
+        for skill, aliases in taxonomy.items():
+            self.canonical[skill] = skill
+            for alias in aliases:
+                self.canonical.setdefault(alias, skill)
+        self.pattern = compile_terms(self.canonical)
+
+    def find(self, text):
+        # canonical skills mentioned in text
+        if self.pattern is None:
+            return set()
+        return {self.canonical[_normalize(m.group(0))] for m in self.pattern.finditer(text.lower())}
+
+    def canonicalize(self, name):
+        # "K8s" -> "kubernetes"; names outside the taxonomy are only normalized
+        name = _normalize(name)
+        return self.canonical.get(name, name)
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher():
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SkillMatcher(load_taxonomy())
+    return _matcher
+
+
+def canonical_skills(names):
+    # query / filter skills as the canonical names resumes are stored under,
+    # first occurrence order, blanks and duplicates dropped
+    matcher = get_skill_matcher()
+    return list(dict.fromkeys(matcher.canonicalize(n) for n in names or [] if n and n.strip()))
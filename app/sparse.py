@@ -0,0 +1,193 @@
+# app/sparse.py
+#
+# BM25 inverted index over resume full text, stored next to the FAISS index
+# and queried alongside it (see search.search_batch).
+#
+#   sparse.json         header {version, rows, avgdl, k1, b}; written last
+#   vocab.json          terms; position = term id
+#   post_indptr.npy     int64 per term, pointer into the postings
+#   post_rows.npy       uint32 metadata-store rows containing the term, ascending
+#   post_tf.npy         uint16 term frequency in that row (clipped)
+#   doc_len.npy         uint32 tokens per row
+#
+# Rows are MetaStore rows (resumes sorted by id). Postings take 6 bytes
+# each and are memory-mapped, so a million resumes of a few hundred
+# distinct terms stay within a couple of GB of page cache. Incremental
+# updates (merge_sparse) renumber the previous postings and tokenize only
+# the added texts.
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from app.metastore import _compact, _load_array, _replace, _save_array
+
+SPARSE_VERSION = 1
+HEADER = "sparse.json"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# keeps c++, c#, .net-style and dotted tokens (node.js) together
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were will with "
+    "we you our your i me my".split()
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+# -------------------------------
+# WRITE
+# -------------------------------
+def _count_terms(texts, vocab):
+    # (term ids, frequencies, tokens per text, distinct terms per text),
+    # adding unseen terms to vocab
+    term_ids, freqs, doc_len = [], [], []
+    for text in texts:
+        counts = Counter(tokenize(text))
+        term_ids.append(np.fromiter((vocab.setdefault(t, len(vocab)) for t in counts), "int64", len(counts)))
+        freqs.append(np.fromiter(counts.values(), "int64", len(counts)))
+        doc_len.append(sum(counts.values()))
+
+    lengths = np.array([len(t) for t in term_ids], dtype="int64")
+    term_ids = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype="int64")
+    freqs = np.concatenate(freqs) if freqs else np.zeros(0, dtype="int64")
+    return term_ids, np.minimum(freqs, np.iinfo("uint16").max).astype("uint16"), doc_len, lengths
+
+
+def write_sparse(path, texts, k1=BM25_K1, b=BM25_B):
+    # texts: full text per MetaStore row, in row order
+    vocab = {}
+    term_ids, freqs, doc_len, lengths = _count_terms(texts, vocab)
+    rows = np.repeat(np.arange(len(doc_len), dtype="uint32"), lengths)
+
+    order = np.argsort(term_ids, kind="stable")  # rows stay ascending per term
+    _save(path, list(vocab), term_ids[order], rows[order], freqs[order], np.array(doc_len, dtype="uint32"), k1, b)
+
+
+def merge_sparse(path, base, rows, texts, new_rows):
+    # base's postings with its rows renumbered by `rows` (new row per old
+    # row, -1 if dropped), plus the postings of texts at new_rows
+    rows = np.asarray(rows, dtype="int64")
+    new_rows = np.asarray(new_rows, dtype="int64")
+    n = int((rows >= 0).sum()) + len(new_rows)
+    vocab = dict(base.vocab)  # the base's own copy may be in use by queries
+    terms = np.repeat(np.arange(len(base.indptr) - 1, dtype="int64"), np.diff(base.indptr))
+    post_rows = rows[base.post_rows]
+    keep = post_rows >= 0
+    terms, post_rows, post_tf = terms[keep], post_rows[keep], np.asarray(base.post_tf)[keep]
+
+    new_terms, new_tf, new_len, lengths = _count_terms(texts, vocab)
+    new_post_rows = np.repeat(new_rows, lengths)
+
+    # old postings stay sorted by (term, row) under the renumbering, so the
+    # new ones are inserted at their sorted positions
+    key = terms * n + post_rows
+    new_key = new_terms * n + new_post_rows
+    order = np.argsort(new_key, kind="stable")
+    at = np.searchsorted(key, new_key[order])
+    terms = np.insert(terms, at, new_terms[order])
+    post_rows = np.insert(post_rows, at, new_post_rows[order])
+    post_tf = np.insert(post_tf, at, new_tf[order])
+    terms, vocab = _compact(terms, list(vocab))
+
+    doc_len = np.zeros(n, dtype="uint32")
+    kept = rows >= 0
+    doc_len[rows[kept]] = _load_array(base.path / "doc_len.npy")[kept]
+    doc_len[new_rows] = new_len
+    _save(path, vocab, terms, post_rows.astype("uint32"), post_tf, doc_len, base.k1, base.b)
+
+
+def _save(path, vocab, terms, rows, tf, doc_len, k1, b):
+    # postings sorted by term, then row
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    indptr = np.zeros(len(vocab) + 1, dtype="int64")
+    np.cumsum(np.bincount(terms, minlength=len(vocab)), out=indptr[1:])
+
+    _save_array(path / "post_indptr.npy", indptr)
+    _save_array(path / "post_rows.npy", rows)
+    _save_array(path / "post_tf.npy", tf)
+    _save_array(path / "doc_len.npy", doc_len)
+    _replace(path / "vocab.json", lambda f: f.write(json.dumps(vocab).encode("utf-8")))
+
+    n = len(doc_len)
+    header = {"version": SPARSE_VERSION, "rows": n, "avgdl": float(doc_len.sum()) / n if n else 0.0,
+              "k1": k1, "b": b}
+    _replace(path / HEADER, lambda f: f.write(json.dumps(header).encode("utf-8")))
+
+
+# -------------------------------
+# READ / QUERY
+# -------------------------------
+class SparseIndex:
+    def __init__(self, path):
+        path = Path(path)
+        header = json.loads((path / HEADER).read_text(encoding="utf-8"))
+        if header.get("version") != SPARSE_VERSION:
+            raise ValueError(f"Unsupported sparse index version: {header.get('version')}")
+
+        self.path = path
+        self.rows = header["rows"]
+        self.k1 = header["k1"]
+        self.b = header["b"]
+        self.indptr = _load_array(path / "post_indptr.npy")
+        self.post_rows = _load_array(path / "post_rows.npy")
+        self.post_tf = _load_array(path / "post_tf.npy")
+        self._vocab_path = path / "vocab.json"
+        self._vocab = None
+
+        # per-row BM25 length normalization, k1 * (1 - b + b * len / avgdl)
+        doc_len = _load_array(path / "doc_len.npy").astype("float32")
+        avgdl = header["avgdl"] or 1.0
+        self._norm = (self.k1 * (1 - self.b + self.b * doc_len / avgdl)).astype("float32")
+
+    @classmethod
+    def exists(cls, path):
+        return (Path(path) / HEADER).exists()
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def vocab(self):
+        # term -> id, built on first query
+        if self._vocab is None:
+            terms = json.loads(self._vocab_path.read_text(encoding="utf-8"))
+            self._vocab = {t: i for i, t in enumerate(terms)}
+        return self._vocab
+
+    def scores(self, query_text):
+        # BM25 score of every row (0 where no query term occurs)
+        acc = np.zeros(self.rows, dtype="float32")
+        vocab = self.vocab
+        for term in set(tokenize(query_text)):
+            tid = vocab.get(term)
+            if tid is None:
+                continue
+            start, end = self.indptr[tid], self.indptr[tid + 1]
+            rows = self.post_rows[start:end]
+            tf = self.post_tf[start:end].astype("float32")
+            df = end - start
+            idf = math.log(1 + (self.rows - df + 0.5) / (df + 0.5))
+            acc[rows] += idf * tf * (self.k1 + 1) / (tf + self._norm[rows])
+        return acc
+
+    def search(self, query_text, top, mask=None):
+        # (scores, rows) of the best `top` rows, best first; mask restricts
+        # to eligible rows
+        acc = self.scores(query_text)
+        if mask is not None:
+            acc[~mask] = 0
+        hits = np.flatnonzero(acc > 0)
+        if len(hits) > top:
+            hits = hits[np.argpartition(-acc[hits], top - 1)[:top]]
+        hits = hits[np.argsort(-acc[hits], kind="stable")]
+        return acc[hits], hits
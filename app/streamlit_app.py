@@ -1,36 +1,84 @@
 # app/streamlit_app.py
 
-import sys, os, re
+import sys, os, re, time
+_script_start = time.perf_counter()
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import streamlit as st
 from pathlib import Path
-from app.utils import build_index_from_folder
-from app.embedder import embed_texts
-from app.search import search
-from app.ai_helpers import summarize_candidate, explain_match
+from app import metrics
+from app.jobs import INDEX_WORKER, RUNNING, enqueue_build, get_queue, get_worker
+from app.embedder import embed_texts, embedding_cache_stats, warm_up
+from app.search import index_generation, load_index, search
+from app.skills import canonical_skills, compile_terms
+from app.filters import ResumeFilter
+from app.ai_helpers import (
+    summarize_candidate, explain_match, summarize_candidates, explain_matches, get_client, CHAT_MODEL
+)
+from app.chat_context import build_chat_prompt
 from app.visuals import candidate_radar_chart
-from app.exporter import export_excel
-from openai import OpenAI
+from app.exporter import XLSX_MIME, export_bytes, export_excel
 import pandas as pd
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# load the embedding model in the background while the page renders
+warm_up()
+if metrics.PORT:
+    metrics.serve(metrics.PORT)  # once per process, not per rerun
+# index builds run in a background worker (or a separate `python -m app.jobs worker`)
+if INDEX_WORKER:
+    get_worker()
+
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap_index():
+    # a fresh checkout has no index: queue one build of the bundled sample
+    # resumes (once per process)
+    if load_index()[0] is None and not get_queue().active() and Path("data/resumes").is_dir():
+        return enqueue_build("data/resumes")
+    return None
+
+
+_bootstrap_index()
 
 
 # =============================
 # Skill Highlighter
 # =============================
+# All skills of a resume go into one compiled pattern (cached per skill
+# set), so the text is scanned once; highlighted texts are cached too and
+# survive reruns.
+@st.cache_resource(max_entries=256, show_spinner=False)
+def _skill_pattern(skills):
+    return compile_terms([" ".join(s.lower().split()) for s in skills], re.IGNORECASE)
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
 def highlight_skills(text, skills):
-    def repl(match):
-        word = match.group(0)
-        return f"**:green[{word}]**"
+    pattern = _skill_pattern(tuple(sorted(set(skills))))
+    if pattern is None:
+        return text
+    return pattern.sub(lambda m: f"**:green[{m.group(0)}]**", text)
+
 
-    for s in skills:
-        if not s:
-            continue
-        pattern = re.compile(rf"\b{re.escape(s)}\b", flags=re.IGNORECASE)
-        text = pattern.sub(repl, text)
-    return text
+# =============================
+# Cached Screening
+# =============================
+# Results are cached per (query, filters, index generation), so reruns
+# (checkbox toggles, paging, chat) reuse them and a rebuilt index gives
+# fresh ones. _filters is described by filters_key for the cache.
+@st.cache_data(max_entries=32, show_spinner=False)
+def run_screening(jd, query_skills, query_years, k, filters_key, generation, _filters=None):
+    q_emb = embed_texts([jd])[0]
+    return search(q_emb, k=k, query_skills=list(query_skills), query_years=query_years,
+                  filters=_filters, query_text=jd)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def run_batch_ai(task, jd, texts):
+    # "summary" / "explain" for a whole result list (LLM answers are also cached on disk)
+    if task == "summary":
+        return summarize_candidates(list(texts))
+    return explain_matches(jd, list(texts))
 
 
 # =============================
@@ -46,11 +94,67 @@ st.title("💼 Resume Screening Agent (AI-Powered)")
 # =============================
 st.sidebar.header("⚙ Settings")
 
+full_rebuild = st.sidebar.checkbox("Force full rebuild", value=False)
+
 if st.sidebar.button("📌 Build / Rebuild Index"):
-    count = build_index_from_folder("data/resumes")
-    st.sidebar.success(f"Indexed {count} resumes")
+    job_id = enqueue_build("data/resumes", full=full_rebuild)
+    st.sidebar.info(f"Index build queued (job #{job_id})")
+
+
+def index_job_status():
+    # queued / running builds with progress, else the outcome of the last one
+    jobs = get_queue().active()
+    for job in jobs:
+        if job["status"] == RUNNING:
+            frac = job["done"] / job["total"] if job["total"] else 0.0
+            eta = f", ~{job['eta_s']:.0f}s left" if job["eta_s"] is not None else ""
+            st.progress(frac, text=f"Indexing ({job['stage']}): {job['done']}/{job['total']} files{eta}")
+        else:
+            st.caption(f"Index build #{job['id']} queued")
+    if jobs:
+        return
+
+    last = get_queue().recent(1)
+    if not last:
+        return
+    job = last[0]
+    if job["error"]:
+        st.error(f"Index build #{job['id']} failed: {job['error']}")
+    elif job["result"]:
+        stats = job["result"]
+        st.success(
+            f"Indexed {stats['total']} resumes "
+            f"(added {stats['added']}, updated {stats['updated']}, "
+            f"removed {stats['removed']}, skipped {stats['skipped']})"
+        )
+        for name, error in stats["errors"].items():
+            st.warning(f"Skipped {name}: {error}")
+
+
+# re-drawn every 2 s on its own where st.fragment is available
+if hasattr(st, "fragment"):
+    index_job_status = st.fragment(run_every=2)(index_job_status)
+with st.sidebar:
+    index_job_status()
 
 k = st.sidebar.slider("Top K Candidates", 1, 20, 5)
+page_size = st.sidebar.selectbox("Candidates per page", [5, 10, 20], index=0)
+
+# generated for all top-k candidates at once (concurrently, cached)
+summarize_all = st.sidebar.checkbox("AI summaries for all candidates", value=False)
+explain_all = st.sidebar.checkbox("JD match explanations for all candidates", value=False)
+
+cache_stats = embedding_cache_stats()
+if cache_stats:
+    st.sidebar.caption(
+        f"Embedding cache: {cache_stats['entries']} entries, "
+        f"{cache_stats['hits']} hits / {cache_stats['misses']} misses"
+    )
+
+if metrics.ENABLED:
+    with st.sidebar.expander("Stage timings"):
+        stages = metrics.snapshot()["stages"]
+        st.dataframe(pd.DataFrame.from_dict(stages, orient="index").sort_index(), use_container_width=True)
 
 
 # =============================
@@ -69,10 +173,23 @@ with col1:
 
     st.write("Desired skills (comma-separated):")
     skills_raw = st.text_input("Example: python, sql, aws, machine learning")
-    query_skills = [s.strip().lower() for s in skills_raw.split(",") if s.strip()]
+    query_skills = canonical_skills(skills_raw.split(","))
 
     query_years = st.number_input("Desired years of experience", 0, 50, 0)
 
+    with st.expander("Hard filters"):
+        require_skills = st.checkbox("Candidates must have all desired skills")
+        require_years = st.checkbox("Desired years of experience is a minimum")
+        file_types = st.multiselect("File types", ["pdf", "docx", "txt"])
+        ingested_after = st.date_input("Added on or after", value=None)
+
+    filters = ResumeFilter(
+        required_skills=query_skills if require_skills else None,
+        min_years=query_years if require_years and query_years else None,
+        file_types=file_types,
+        ingested_after=ingested_after,
+    )
+
     st.header("2️⃣ Upload Resumes (Optional)")
     uploaded = st.file_uploader("Upload PDF / DOCX / TXT resumes", accept_multiple_files=True)
 
@@ -80,136 +197,157 @@ with col1:
         save_dir = Path("data/resumes")
         save_dir.mkdir(parents=True, exist_ok=True)
 
-        for f in uploaded:
+        # the uploader keeps its files across reruns; each is saved and queued once
+        queued = st.session_state.setdefault("queued_uploads", set())
+        new = [f for f in uploaded if (f.name, f.size) not in queued]
+        for f in new:
             with open(save_dir / f.name, "wb") as out:
                 out.write(f.getbuffer())
+            queued.add((f.name, f.size))
 
-        st.success("Uploaded! Now click **Build / Rebuild Index** from the sidebar.")
+        if new:
+            job_id = enqueue_build(save_dir, files=[f.name for f in new])
+            st.success(f"Uploaded! Indexing {len(new)} new file(s) in the background (job #{job_id}).")
 
     # =============================
     # RUN SCREENING
     # =============================
+    # the last screening is kept in session_state so that it is still shown
+    # on the reruns triggered by the widgets below
     if st.button("🚀 Run Screening"):
 
         if not jd.strip():
             st.error("Please paste a job description.")
 
         else:
-            with st.spinner("Embedding JD..."):
-                q_emb = embed_texts([jd])[0]
-
-            with st.spinner("Searching resumes..."):
-                results = search(q_emb, k=k, query_skills=query_skills, query_years=query_years)
-
-            if not results:
-                st.warning("No index found. Add resumes and rebuild index.")
-
-            else:
-                st.success(f"Found {len(results)} candidates")
-
-                rows = []
-
-                for i, r in enumerate(results, 1):
-
-                    st.subheader(f"⭐ {i}. {r['file']} — Score: {r['composite_score']:.3f}")
-
-                    st.markdown(f"""
-                    **Embedding Score:** {r['embed_score']:.3f}  
-                    **Skill Match:** {r['skill_score']:.2f}  
-                    **Experience Score:** {r['exp_score']:.2f}
-                    """)
-
-                    st.write("**Extracted Skills:**", ", ".join(r.get("skills", [])) or "—")
-                    st.write("**Estimated Experience:**", r.get("years_experience", 0), "years")
+            st.session_state.screening = {
+                "jd": jd, "query_skills": tuple(query_skills), "query_years": query_years, "k": k,
+                "filters": filters,
+            }
+            st.session_state.results_page = 1
+
+    screening = st.session_state.get("screening")
+    if screening:
+        screened_jd = screening["jd"]
+        with st.spinner("Searching resumes..."):
+            results = run_screening(screened_jd, screening["query_skills"], screening["query_years"],
+                                    screening["k"], repr(screening["filters"]), index_generation(),
+                                    _filters=screening["filters"])
+
+        if not results and screening["filters"]:
+            st.warning("No resumes match the hard filters.")
+
+        elif not results:
+            st.warning("No index found. Add resumes and rebuild index.")
 
-                    # Radar Chart
+        else:
+            st.success(f"Found {len(results)} candidates")
+
+            texts = tuple(r["full_text"] for r in results)
+            summaries = explanations = None
+            if summarize_all:
+                with st.spinner("Summarizing candidates..."):
+                    summaries = run_batch_ai("summary", None, texts)
+            if explain_all:
+                with st.spinner("Analyzing matches..."):
+                    explanations = run_batch_ai("explain", screened_jd, texts)
+
+            rows = [{
+                "rank": i,
+                "file": r["file"],
+                "composite": r["composite_score"],
+                "embed": r["embed_score"],
+                "skill_score": r["skill_score"],
+                "exp_score": r["exp_score"]
+            } for i, r in enumerate(results, 1)]
+
+            # only one page of candidates is rendered per run
+            pages = -(-len(results) // page_size)
+            if st.session_state.get("results_page", 1) > pages:
+                st.session_state.results_page = pages
+            page = st.number_input("Page", 1, pages, key="results_page") if pages > 1 else 1
+            start = (page - 1) * page_size
+
+            for i, r in enumerate(results[start:start + page_size], start + 1):
+
+                st.subheader(f"⭐ {i}. {r['file']} — Score: {r['composite_score']:.3f}")
+
+                st.markdown(f"""
+                **Embedding Score:** {r['embed_score']:.3f}  
+                **Skill Match:** {r['skill_score']:.2f}  
+                **Experience Score:** {r['exp_score']:.2f}
+                """)
+                if "bm25_score" in r:
+                    st.caption(f"Keyword (BM25) score: {r['bm25_score']:.2f} · "
+                               f"fused retrieval score: {r['retrieval_score']:.3f}")
+
+                st.write("**Extracted Skills:**", ", ".join(r.get("skills", [])) or "—")
+                st.write("**Estimated Experience:**", r.get("years_experience", 0), "years")
+
+                # Highlighted Snippet
+                snippet = r.get("full_text", "")[:1000]
+                st.markdown(highlight_skills(snippet, r.get("skills", [])))
+
+                # Radar Chart / Full Resume Preview: built only when asked for
+                if st.checkbox(f"📊 Radar chart for {r['file']}"):
                     st.plotly_chart(candidate_radar_chart(r), use_container_width=True)
 
-                    # Highlighted Snippet
-                    snippet = r.get("full_text", "")[:1000]
-                    highlighted = highlight_skills(snippet, r.get("skills", []))
-                    st.markdown(highlighted)
-
-                    # Full Resume Preview
-                    with st.expander("📄 Full Resume Text (Preview)"):
-                        full_res_text = highlight_skills(r["full_text"], r["skills"])
-                        st.markdown(full_res_text)
-
-                    # AI Summary
-                    if st.checkbox(f"Show AI Summary for {r['file']}"):
-                        with st.spinner("Summarizing candidate..."):
-                            summary = summarize_candidate(r["full_text"])
-                        st.write(summary)
-
-                    # AI Match Explanation
-                    if st.checkbox(f"Explain JD Match for {r['file']}"):
-                        with st.spinner("Analyzing match..."):
-                            explanation = explain_match(jd, r["full_text"])
-                        st.write(explanation)
-
-                    st.markdown("---")
-
-                    rows.append({
-                        "rank": i,
-                        "file": r["file"],
-                        "composite": r["composite_score"],
-                        "embed": r["embed_score"],
-                        "skill_score": r["skill_score"],
-                        "exp_score": r["exp_score"]
-                    })
-
-                # Download CSV
-                df = pd.DataFrame(rows)
+                if st.checkbox(f"📄 Full resume text of {r['file']}"):
+                    st.markdown(highlight_skills(r["full_text"], r["skills"]))
+
+                # AI Summary
+                if summaries is not None:
+                    st.write("**AI Summary:**")
+                    st.write(summaries[i - 1])
+                elif st.checkbox(f"Show AI Summary for {r['file']}"):
+                    with st.spinner("Summarizing candidate..."):
+                        summary = summarize_candidate(r["full_text"])
+                    st.write(summary)
+
+                # AI Match Explanation
+                if explanations is not None:
+                    st.write("**JD Match:**")
+                    st.write(explanations[i - 1])
+                elif st.checkbox(f"Explain JD Match for {r['file']}"):
+                    with st.spinner("Analyzing match..."):
+                        explanation = explain_match(screened_jd, r["full_text"])
+                    st.write(explanation)
+
+                st.markdown("---")
+
+            # Download CSV
+            st.download_button(
+                "⬇ Download Screening Results (CSV)",
+                export_bytes(rows, "csv"),
+                file_name="screening_results.csv",
+                mime="text/csv"
+            )
+
+            # Download Excel (built in memory for this session only)
+            if st.button("⬇ Download Excel (Formatted)"):
                 st.download_button(
-                    "⬇ Download Screening Results (CSV)",
-                    df.to_csv(index=False),
-                    file_name="screening_results.csv",
-                    mime="text/csv"
+                    "Download Excel File",
+                    export_excel(rows),
+                    file_name="screening_results.xlsx",
+                    mime=XLSX_MIME
                 )
 
-                # Download Excel
-                if st.button("⬇ Download Excel (Formatted)"):
-                    file_path = export_excel(rows)
-                    with open(file_path, "rb") as f:
-                        st.download_button(
-                            "Download Excel File",
-                            f.read(),
-                            file_name=file_path,
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
-
-                # Recruiter Chatbot
-                st.header("🤖 Recruiter Chatbot")
-                chat_q = st.text_input("Ask anything about the shortlisted candidates...")
-
-                if chat_q:
-                    st.write("Thinking...")
-
-                    full_context = ""
-                    for r in results:
-                        full_context += f"""
-Candidate: {r['file']}
-Skills: {', '.join(r['skills'])}
-Experience: {r['years_experience']} yrs
-Text:
-{r['full_text'][:1500]}
+            # Recruiter Chatbot
+            st.header("🤖 Recruiter Chatbot")
+            chat_q = st.text_input("Ask anything about the shortlisted candidates...")
 
-"""
+            if chat_q:
+                st.write("Thinking...")
 
-                    prompt = f"""
-You are a recruiter assistant. Use ONLY the information from these resumes:
+                # only the resume chunks relevant to the question, within a token budget
+                prompt = build_chat_prompt(chat_q, results)
 
-{full_context}
-
-Question: {chat_q}
-"""
-
-                    resp = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}]
-                    )
+                resp = get_client().chat.completions.create(
+                    model=CHAT_MODEL,
+                    messages=[{"role": "user", "content": prompt}]
+                )
 
-                    st.write(resp.choices[0].message["content"])
+                st.write(resp.choices[0].message.content)
 
 
 # =============================
@@ -265,4 +403,5 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-
+# import-to-render time of this run (model loading happens off this path)
+st.sidebar.caption(f"Page rendered in {(time.perf_counter() - _script_start) * 1000:.0f} ms")
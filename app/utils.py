@@ -1,34 +1,211 @@
 # app/utils.py
+import hashlib
+import json
+import os
 from pathlib import Path
-from app.resume_parser import load_resume_text, parse_resume_sections
-from app.embedder import embed_texts
-from app.search import create_index
+from app import metrics
+from app.ingest import iter_parsed
+from app.embedder import VectorBuffer, embed_texts
+from app.search import create_index, update_index, load_index, manifest_path
+from app.index_factory import INDEX_TYPE
+from app.chunking import INDEX_GRANULARITY, GRANULARITIES, chunk_ids, resume_chunks
 
-def build_index_from_folder(folder="data/resumes"):
-    folder = Path(folder)
+# Manifest of indexed files: name -> {size, mtime_ns, sha256, id}, plus the
+# index type and granularity ("resume" / "chunk") it was built with. It is
+# stored inside the index generation it describes (app.search), so the two
+# are swapped in together.
+MANIFEST_VERSION = 1
+
+# parsed resumes per embed_texts call
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+# when set, build-time vectors are collected in a memory-mapped file in this
+# directory instead of RAM (removed once the index is written)
+EMBED_MMAP_DIR = os.getenv("EMBED_MMAP_DIR")
+
+
+# -------------------------------
+# MANIFEST
+# -------------------------------
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest():
+    path = manifest_path()
+    if not path.exists():
+        return None
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(manifest):
+    # in place, for builds that leave the index itself unchanged; index
+    # writes store the manifest in their new generation instead
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _file_entry(stat, digest, vid):
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest, "id": vid}
+
+
+# -------------------------------
+# INGESTION -> BATCHED EMBEDDING
+# -------------------------------
+def _ingest(plan, embeddings, workers=None, granularity="resume", progress=None):
+    # plan: {path: resume id}. Parsed records are embedded in batches while
+    # the worker pool keeps parsing the rest; vectors are appended to the
+    # `embeddings` VectorBuffer. With granularity="chunk" every resume
+    # contributes several texts; vector_ids then has one id per embedding
+    # (None otherwise). progress("ingest", done, total) is called per file.
+    chunked = granularity == "chunk"
+    metas, ids, vector_ids, errors = [], [], [], {}
+    batch_docs = []
+
+    def flush():
+        if batch_docs:
+            embeddings.append(embed_texts(batch_docs))
+            batch_docs.clear()
+
+    for done, (path, search_text, meta, error) in enumerate(iter_parsed(list(plan), workers=workers), 1):
+        metrics.inc("ingest_files_total", status="error" if error else "ok")
+        if progress:
+            progress("ingest", done, len(plan))
+        if error:
+            errors[path] = error
+            continue
+        if chunked:
+            texts = resume_chunks(search_text, meta["full_text"])
+            meta["chunks"] = len(texts)
+            vector_ids.extend(chunk_ids([plan[path]], [len(texts)]).tolist())
+        else:
+            texts = [search_text]
+        batch_docs.extend(texts)
+        metas.append(meta)
+        ids.append(plan[path])
+        if len(batch_docs) >= EMBED_BATCH_SIZE:
+            flush()
+    flush()
+
+    return metas, ids, vector_ids if chunked else None, errors
+
+
+# -------------------------------
+# INDEX BUILD
+# -------------------------------
+# With incremental=True only files added or changed since the last build
+# (per the manifest) are parsed and embedded, and files that disappeared are
+# removed from the index. Files that fail to parse are left out (and retried
+# on the next build). Returns added / updated / removed / skipped / failed /
+# total counts plus an {file: error} dict. progress(stage, done, total), if
+# given, is called as files are parsed ("ingest") and before the index is
+# written ("write"); see app.jobs.
+def build_index_from_folder(folder="data/resumes", incremental=True, workers=None, granularity=None,
+                            progress=None):
+    with metrics.span("build", incremental=incremental) as span:
+        stats = _build(Path(folder), incremental, workers, granularity or INDEX_GRANULARITY, progress)
+        span.set(**{k: v for k, v in stats.items() if k != "errors"})
+        return stats
+
+
+def _build(folder, incremental, workers, granularity, progress=None):
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown index granularity {granularity!r}; expected one of {GRANULARITIES}")
     files = sorted([f for f in folder.iterdir() if f.is_file()])
-    docs = []
-    metas = []
+    stats = {"added": 0, "updated": 0, "removed": 0, "skipped": 0, "failed": 0, "total": 0, "errors": {}}
+
+    manifest = load_manifest() if incremental else None
+    if manifest is not None:
+        index, _ = load_index()
+        if (index is None or manifest.get("index_type") != INDEX_TYPE
+                or manifest.get("granularity", "resume") != granularity):
+            # index missing, legacy format, INDEX_TYPE or granularity changed -> full rebuild
+            manifest = None
+
+    full = manifest is None
+    if full:
+        manifest = {"version": MANIFEST_VERSION, "index_type": INDEX_TYPE, "granularity": granularity,
+                    "next_id": 0, "files": {}}
+
+    entries = manifest["files"]
+    next_id = manifest["next_id"]
+    plan = {}
+    pending = {}
+    seen = set()
+
     for f in files:
-        text = load_resume_text(f)
-        parsed = parse_resume_sections(text)
-        # Create search_text containing skills + experience + education
-        search_text = " ".join([
-            " ".join(parsed.get("skills", [])),
-            parsed.get("experience", ""),
-            parsed.get("education", "")
-        ]).strip()
-        if not search_text:
-            search_text = parsed["full_text"][:2000]
-        docs.append(search_text)
-        metas.append({
-            "file": f.name,
-            "full_text": parsed["full_text"],
-            "skills": parsed.get("skills", []),
-            "years_experience": parsed.get("years_experience", 0)
-        })
-    if not docs:
-        return 0
-    embeddings = embed_texts(docs)
-    create_index(embeddings, metas)
-    return len(docs)
+        seen.add(f.name)
+        stat = f.stat()
+        entry = entries.get(f.name)
+
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            stats["skipped"] += 1
+            continue
+
+        digest = file_sha256(f)
+        if entry and entry["sha256"] == digest:
+            # touched but unchanged content
+            entries[f.name] = _file_entry(stat, digest, entry["id"])
+            stats["skipped"] += 1
+            continue
+
+        if entry:
+            vid = entry["id"]
+        else:
+            vid = next_id
+            next_id += 1
+
+        plan[str(f)] = vid
+        pending[str(f)] = (f.name, _file_entry(stat, digest, vid), entry is not None)
+
+    remove_ids = []
+    for name in sorted(set(entries) - seen):
+        remove_ids.append(entries.pop(name)["id"])
+        stats["removed"] += 1
+
+    mmap_path = Path(EMBED_MMAP_DIR) / f"build-{os.getpid()}.f32" if EMBED_MMAP_DIR else None
+    embeddings = VectorBuffer(len(plan), mmap_path)
+    try:
+        with metrics.span("build.ingest", files=len(plan)):
+            metas, ids, vector_ids, errors = _ingest(plan, embeddings, workers=workers, granularity=granularity,
+                                                     progress=progress)
+
+        for path, (name, entry, is_update) in pending.items():
+            if path in errors:
+                stats["failed"] += 1
+                stats["errors"][name] = errors[path]
+                continue
+            entries[name] = entry
+            stats["updated" if is_update else "added"] += 1
+
+        stats["total"] = len(entries)
+        manifest["next_id"] = next_id
+
+        if progress:
+            progress("write", len(plan), len(plan))
+        # the buffer's rows go to FAISS as-is (float32, no copy); the
+        # manifest is published with the index generation
+        with metrics.span("build.write_index", full=full):
+            if full:
+                if not ids:
+                    return stats
+                create_index(embeddings.array, metas, ids, vector_ids=vector_ids, manifest=manifest)
+            elif ids or remove_ids:
+                update_index(embeddings.array, metas, ids, remove_ids, vector_ids=vector_ids, manifest=manifest)
+            else:
+                save_manifest(manifest)  # only size / mtime refreshes
+    finally:
+        embeddings.close()
+    return stats
@@ -0,0 +1,102 @@
+# benchmarks/bench_chunks.py
+#
+# One vector per resume against chunk-level vectors (app.chunking): build
+# time, index size, query latency, and how often a sentence from deep in a
+# resume's work history finds that resume in the top k.
+#
+#   python benchmarks/bench_chunks.py --docs 1000 --jobs 8 --queries 200
+#
+# Uses the configured embedder (EMBED_MODE); the embedding cache is disabled
+# so both builds embed from scratch.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["EMBED_CACHE"] = "0"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.embedder import embed_texts
+from app.search import index_files, load_index, search_batch
+from app.utils import build_index_from_folder
+from benchmarks.synth import corpus
+
+
+def _late_sentence(rng, text):
+    # a sentence from the second half of the resume (older jobs)
+    lines = [l for l in text.splitlines() if l.endswith(".")]
+    return rng.choice(lines[len(lines) // 2:])
+
+
+def _size_mb():
+    index_path, meta_path, _ = index_files()
+    meta = sum(f.stat().st_size for f in meta_path.iterdir())
+    return (index_path.stat().st_size + meta) / 2**20
+
+
+def _run(granularity, queries, truth, k, agg):
+    start = time.perf_counter()
+    build_index_from_folder("resumes", incremental=False, workers=1, granularity=granularity)
+    build_s = time.perf_counter() - start
+    index, _ = load_index()
+
+    latencies, hits = [], 0
+    for q, name in zip(queries, truth):
+        start = time.perf_counter()
+        results = search_batch([q], k=k, chunk_agg=agg)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(r["file"] == name for r in results)
+    return {
+        "mode": granularity if granularity == "resume" else f"chunk/{agg}",
+        "vectors": index.ntotal,
+        "size_mb": _size_mb(),
+        "build_s": build_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        f"hit@{k}": hits / len(queries),
+    }
+
+
+def run(n_docs, jobs, n_queries, k, seed=0):
+    rng = random.Random(seed)
+    docs = corpus(n_docs, seed=seed, n_jobs=jobs, paragraphs_per_job=3)
+    picks = [rng.randrange(n_docs) for _ in range(n_queries)]
+    queries = embed_texts([_late_sentence(rng, docs[i]) for i in picks])
+    truth = [f"r{i:06d}.txt" for i in picks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        folder = Path("resumes")
+        folder.mkdir()
+        for i, d in enumerate(docs):
+            (folder / f"r{i:06d}.txt").write_text(d, encoding="utf-8")
+
+        rows = [_run("resume", queries, truth, k, None)]
+        rows.append(_run("chunk", queries, truth, k, "max"))
+        rows.append(_run("chunk", queries, truth, k, "mean"))
+
+    print(f"{'mode':12} {'vectors':>8} {'MB':>7} {'build s':>8} {'p50 ms':>7} {'p95 ms':>7} {'hit@' + str(k):>7}")
+    for r in rows:
+        print(f"{r['mode']:12} {r['vectors']:8d} {r['size_mb']:7.1f} {r['build_s']:8.2f} "
+              f"{r['p50_ms']:7.2f} {r['p95_ms']:7.2f} {r[f'hit@{k}']:7.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume-level vs chunk-level embeddings.")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=8, help="jobs per resume (controls resume length)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    run(args.docs, args.jobs, args.queries, args.k, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_export.py
+#
+# Export throughput of app.exporter per format on synthetic screening rows
+# (the batch_screen.RESULT_FIELDS layout): rows/s, file size and peak RSS
+# growth. --legacy adds the old pandas to_excel + openpyxl reload path for
+# comparison.
+#
+#   python benchmarks/bench_export.py --rows 200000 --formats csv jsonl xlsx parquet --legacy
+
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.batch_screen import RESULT_FIELDS
+from app.exporter import EXPORT_FORMATS, write_results
+
+
+def _rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def result_rows(n, k=10, seed=0):
+    # generated lazily, like batch_screen.result_rows
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {
+            "jd_id": f"jd-{i // k:06d}",
+            "rank": i % k + 1,
+            "file": f"r{rng.randrange(10**6):06d}.pdf",
+            "composite": rng.random(),
+            "embed": rng.random(),
+            "bm25": rng.random() * 20,
+            "skill_score": rng.random(),
+            "exp_score": rng.random(),
+            "years_experience": rng.randint(0, 30),
+        }
+
+
+def _streaming(rows, path):
+    return write_results(rows, path, fields=RESULT_FIELDS)
+
+
+def _legacy_xlsx(rows, path):
+    # the previous export: DataFrame -> to_excel, reopen, bold header, save again
+    import openpyxl
+    import pandas as pd
+    from openpyxl.styles import Font
+
+    rows = list(rows)
+    pd.DataFrame(rows).to_excel(path, index=False)
+    wb = openpyxl.load_workbook(path)
+    for cell in wb.active[1]:
+        cell.font = Font(bold=True)
+    wb.save(path)
+    return len(rows)
+
+
+def _run(name, n, write, path):
+    rss = _rss_mb()
+    start = time.perf_counter()
+    count = write(result_rows(n), path)
+    elapsed = time.perf_counter() - start
+    return {
+        "format": name,
+        "rows": count,
+        "seconds": elapsed,
+        "rows_per_s": count / elapsed if elapsed > 0 else float("inf"),
+        "size_mb": os.path.getsize(path) / 2**20,
+        # ru_maxrss only grows, so run the formats lightest first
+        "peak_rss_growth_mb": _rss_mb() - rss,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming export throughput per format.")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--formats", nargs="+", default=["csv", "jsonl", "parquet", "xlsx"],
+                        choices=EXPORT_FORMATS)
+    parser.add_argument("--legacy", action="store_true", help="also time the old pandas + openpyxl xlsx export")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.formats:
+            results.append(_run(fmt, args.rows, _streaming, os.path.join(tmp, f"out.{fmt}")))
+        if args.legacy:
+            results.append(_run("xlsx (legacy)", args.rows, _legacy_xlsx, os.path.join(tmp, "legacy.xlsx")))
+
+    print(f"{'format':14} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'MB':>7} {'RSS +MB':>8}")
+    for r in results:
+        print(f"{r['format']:14} {r['rows']:9d} {r['seconds']:8.2f} {r['rows_per_s']:10.0f} "
+              f"{r['size_mb']:7.1f} {r['peak_rss_growth_mb']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
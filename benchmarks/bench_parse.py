@@ -0,0 +1,96 @@
+# benchmarks/bench_parse.py
+#
+# Parse throughput of parse_resume_sections on a synthetic corpus, against
+# the previous multi-regex implementation (kept below as the baseline).
+#
+#   python benchmarks/bench_parse.py --docs 2000 --jobs 2 10
+
+import argparse
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.resume_parser import parse_resume_sections, extract_skills, extract_name
+from benchmarks.synth import corpus
+
+
+# -------------------------------
+# BASELINE (previous implementation)
+# -------------------------------
+def _legacy_years(text):
+    years = []
+    text = text.lower()
+    for m in re.finditer(r"(19|20)\d{2}\s*(?:-|–|—|to)\s*(present|19\d{2}|20\d{2})", text):
+        start = int(m.group(0)[:4])
+        end = datetime.now().year if "present" in m.group(2) else int(m.group(2))
+        years.append(max(0, end - start))
+    for m in re.finditer(r"(since|from)\s*(19|20)\d{2}", text):
+        years.append(datetime.now().year - int(m.group(0)[-4:]))
+    return sum(years) if years else 0
+
+
+def _legacy_search(pattern, text, flags=0):
+    m = re.search(pattern, text, flags)
+    return m.group(0) if m else None
+
+
+def legacy_parse(text):
+    lines = [l.strip() for l in text.splitlines() if l.strip()]
+    full_text = "\n".join(lines)
+    skills = extract_skills(full_text)
+    years_exp = _legacy_years(full_text)
+    exp_m = re.search(
+        r"(experience|work experience|employment history)[:\n](.*?)(\neducation[:\n]|\nprojects[:\n]|\Z)",
+        full_text, re.S | re.I)
+    edu_m = re.search(r"(education|academic qualifications)[:\n](.*?)(\n[A-Z][a-z]+:|\Z)",
+                      full_text, re.S | re.I)
+    return {
+        "full_text": full_text,
+        "name": extract_name(full_text),
+        "email": _legacy_search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", full_text),
+        "phone": _legacy_search(r"(\+?\d[\d\-\s]{8,15})", full_text),
+        "linkedin": _legacy_search(r"(https?://)?(www\.)?linkedin\.com/[A-Za-z0-9_/.-]+", full_text),
+        "skills": skills,
+        "experience": exp_m.group(2).strip() if exp_m else "",
+        "education": edu_m.group(2).strip() if edu_m else "",
+        "years_experience": years_exp,
+    }
+
+
+# -------------------------------
+# RUN
+# -------------------------------
+def _throughput(fn, docs):
+    start = time.perf_counter()
+    for d in docs:
+        fn(d)
+    elapsed = time.perf_counter() - start
+    return len(docs) / elapsed, sum(len(d) for d in docs) / elapsed / 2**20
+
+
+def run(n_docs, job_counts, seed=0):
+    print(f"{'jobs':>5} {'avg KB':>7} {'baseline docs/s':>16} {'segmenter docs/s':>17} {'MB/s':>6} {'speedup':>8}")
+    for jobs in job_counts:
+        docs = corpus(n_docs, seed=seed, n_jobs=jobs, paragraphs_per_job=3)
+        avg_kb = sum(len(d) for d in docs) / len(docs) / 1024
+        base, _ = _throughput(legacy_parse, docs)
+        new, mb_s = _throughput(parse_resume_sections, docs)
+        print(f"{jobs:5d} {avg_kb:7.1f} {base:16.0f} {new:17.0f} {mb_s:6.1f} {new / base:7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="parse_resume_sections throughput on a synthetic corpus.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[2, 10, 40],
+                        help="jobs per resume (controls resume length)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    run(args.docs, args.jobs, args.seed)
+
+
+if __name__ == "__main__":
+    main()
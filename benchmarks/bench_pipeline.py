@@ -0,0 +1,236 @@
+# benchmarks/bench_pipeline.py
+#
+# End-to-end pipeline benchmark on a synthetic corpus. Times each stage
+# (load_resume_text, parse_resume_sections, embed_texts, create_index,
+# load_index, search) and reports throughput, p50/p95/p99 latency and the
+# process' peak RSS after the stage as JSON, for comparison between commits.
+#
+#   python benchmarks/bench_pipeline.py --docs 1000 --formats txt docx pdf -o bench.json
+#
+# Runs offline with the hash stub embedder by default (--embed-mode local /
+# openai for the real ones). The embedding cache is off unless --cache.
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.synth import ROLES, SKILLS, WRITERS, generate_files
+
+
+# -------------------------------
+# MEASUREMENT
+# -------------------------------
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.items = 0
+        self.peak_rss_mb = None
+
+    @contextmanager
+    def timed(self, items=1):
+        start = time.perf_counter()
+        yield
+        self.latencies.append(time.perf_counter() - start)
+        self.items += items
+
+    def done(self):
+        self.peak_rss_mb = peak_rss_mb()
+
+    def report(self):
+        total = sum(self.latencies)
+        ms = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+        return {
+            "calls": len(self.latencies),
+            "items": self.items,
+            "total_s": total,
+            "items_per_s": self.items / total if total > 0 else None,
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _job_descriptions(n, seed):
+    rng = random.Random(seed)
+    jds = []
+    for _ in range(n):
+        skills = rng.sample(SKILLS, rng.randint(2, 5))
+        years = rng.randint(0, 10)
+        jds.append((f"Hiring a {rng.choice(ROLES)} with {years}+ years of experience in "
+                    f"{', '.join(skills)}. You will build and maintain production systems.", skills, years))
+    return jds
+
+
+# -------------------------------
+# RUN
+# -------------------------------
+def run(args):
+    # imported here so that EMBED_MODE / EMBED_CACHE from the command line apply
+    from app.embedder import VectorBuffer, embed_texts
+    from app.ingest import make_meta, make_search_text
+    from app.resume_parser import load_resume_text, parse_resume_sections
+    from app.search import clear_index_cache, create_index, load_index, search
+
+    stages = {name: Stage(name) for name in
+              ("generate", "load_resume_text", "parse_resume_sections", "embed_texts",
+               "create_index", "load_index", "embed_queries", "search")}
+
+    corpus = Path(args.corpus) if args.corpus else Path("resumes")
+    if not args.corpus:
+        gen = stages["generate"]
+        with gen.timed(args.docs):
+            for _ in generate_files(corpus, args.docs, tuple(args.formats), args.seed,
+                                    skill_zipf=args.skill_zipf, job_range=tuple(args.jobs)):
+                pass
+        gen.done()
+    files = sorted(f for f in corpus.iterdir() if f.is_file())
+
+    # load -> parse per file; search texts are embedded in batches as they fill
+    load, parse, embed = stages["load_resume_text"], stages["parse_resume_sections"], stages["embed_texts"]
+    vectors = VectorBuffer(len(files))
+    metas, batch = [], []
+
+    def flush():
+        if batch:
+            with embed.timed(len(batch)):
+                vectors.append(embed_texts(batch))
+            batch.clear()
+
+    for f in files:
+        with load.timed():
+            text = load_resume_text(f)
+        with parse.timed():
+            parsed = parse_resume_sections(text)
+        batch.append(make_search_text(parsed))
+        metas.append(make_meta(f.name, parsed))
+        if len(batch) >= args.embed_batch:
+            flush()
+    flush()
+    for name in ("load_resume_text", "parse_resume_sections", "embed_texts"):
+        stages[name].done()
+
+    with stages["create_index"].timed(len(metas)):
+        create_index(vectors.array, metas, list(range(len(metas))))
+    stages["create_index"].done()
+    del metas, vectors
+
+    for _ in range(args.load_repeats):
+        clear_index_cache()
+        with stages["load_index"].timed():
+            load_index(force=True)
+    stages["load_index"].done()
+
+    jds = _job_descriptions(args.queries, args.seed + 1)
+    with stages["embed_queries"].timed(len(jds)):
+        query_vectors = embed_texts([jd for jd, _, _ in jds])
+    stages["embed_queries"].done()
+
+    for q, (jd, skills, years) in zip(query_vectors, jds):
+        with stages["search"].timed():
+            search(q, k=args.k, query_skills=skills, query_years=years,
+                   query_text=None if args.dense_only else jd)
+    stages["search"].done()
+
+    from app.embedder import MODE
+    from app.index_factory import INDEX_TYPE
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "docs": len(files),
+            "formats": args.formats,
+            "seed": args.seed,
+            "embed_mode": MODE,
+            "index_type": INDEX_TYPE,
+            "queries": args.queries,
+            "k": args.k,
+            "hybrid": not args.dense_only,
+        },
+        "stages": {name: s.report() for name, s in stages.items() if s.latencies},
+    }
+
+
+def _print_table(result):
+    print(f"{'stage':22} {'items':>8} {'total s':>8} {'items/s':>10} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'peak MB':>8}", file=sys.stderr)
+    for name, r in result["stages"].items():
+        rate = f"{r['items_per_s']:10.1f}" if r["items_per_s"] else f"{'-':>10}"
+        print(f"{name:22} {r['items']:8d} {r['total_s']:8.2f} {rate} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+              f"{r['p99_ms']:8.2f} {r['peak_rss_mb']:8.0f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on a synthetic corpus.")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--formats", nargs="+", default=["txt"], choices=sorted(WRITERS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skill-zipf", type=float, default=0.0, help="skill popularity skew (0 = uniform)")
+    parser.add_argument("--jobs", type=int, nargs=2, default=[1, 5], metavar=("MIN", "MAX"))
+    parser.add_argument("--corpus", help="use the resumes in this folder instead of generating")
+    parser.add_argument("--workdir", help="where the corpus and index go (default: a temporary directory)")
+    parser.add_argument("--embed-mode", default="hash", choices=["hash", "local", "openai"])
+    parser.add_argument("--embed-batch", type=int, default=256)
+    parser.add_argument("--cache", action="store_true", help="keep the embedding cache on")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--load-repeats", type=int, default=5)
+    parser.add_argument("--dense-only", action="store_true", help="search without the BM25 side")
+    parser.add_argument("-o", "--out", help="JSON output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    os.environ["EMBED_MODE"] = args.embed_mode
+    if not args.cache:
+        os.environ["EMBED_CACHE"] = "0"
+    if args.corpus:
+        args.corpus = os.path.abspath(args.corpus)
+    out = os.path.abspath(args.out) if args.out else None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        os.chdir(workdir)
+        result = run(args)
+
+    _print_table(result)
+    text = json.dumps(result, indent=2)
+    if out:
+        Path(out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
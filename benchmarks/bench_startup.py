@@ -0,0 +1,71 @@
+# benchmarks/bench_startup.py
+#
+# Cold start of the Streamlit app: seconds from a fresh interpreter to the
+# first rendered page (imports + one script run under streamlit's AppTest),
+# with the embedding model loaded eagerly before the page (the old
+# import-time SentenceTransformer) and lazily (warm_up in a background
+# thread, the current path). "ready" is when the model is usable. Every run
+# is a new process so nothing is cached in memory.
+#
+#   python benchmarks/bench_startup.py --runs 5
+#
+# Needs streamlit and sentence-transformers; run it from a directory where
+# the model loads without a download (HF cache or a local model folder).
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app", "streamlit_app.py")
+MODES = ("eager", "lazy")
+
+
+def _child(mode):
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    from app import embedder
+
+    if mode == "eager":
+        embedder.get_model()
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.run()
+    render = time.perf_counter() - start
+    if at.exception:
+        raise SystemExit(f"app raised: {at.exception[0].value}")
+    embedder.get_model()
+    print(json.dumps({"render_s": render, "ready_s": time.perf_counter() - start}))
+
+
+def _run(mode):
+    env = dict(os.environ, EMBED_MODE="local")
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode], env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-to-first-render time, eager vs lazy model loading.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(args.child)
+        return
+
+    _run("lazy")  # warms the OS file cache for both modes
+    print(f"{'mode':6} {'first render s':>15} {'model ready s':>14}   (median of {args.runs})")
+    for mode in MODES:
+        runs = [_run(mode) for _ in range(args.runs)]
+        print(f"{mode:6} {statistics.median(r['render_s'] for r in runs):15.2f} "
+              f"{statistics.median(r['ready_s'] for r in runs):14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# benchmarks/synth.py
+#
+# Reproducible synthetic resume text for benchmarks, and resume files on
+# disk (TXT / DOCX / PDF) for end-to-end runs:
+#
+#   python benchmarks/synth.py out/resumes --docs 10000 --formats txt docx pdf
+
+import argparse
+import random
+import sys
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+FIRST_NAMES = ["Alice", "Bob", "Chen", "Divya", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jamal",
+               "Kavya", "Liam", "Maya", "Nikhil", "Olga", "Priya", "Quinn", "Ravi", "Sara", "Tomas"]
+LAST_NAMES = ["Example", "Sharma", "Nguyen", "Garcia", "Okafor", "Schmidt", "Kumar", "Rossi",
+              "Tanaka", "Silva", "Haddad", "Novak"]
+COMPANIES = ["ExampleCorp", "Acme Analytics", "Globex", "Initech", "Umbrella Labs", "Hooli",
+             "Stark Industries", "Wayne Data", "Cyberdyne", "Soylent Systems"]
+ROLES = ["Data Scientist", "Software Engineer", "ML Engineer", "Backend Developer", "Data Analyst",
+         "DevOps Engineer", "Frontend Developer", "Research Engineer"]
+DEGREES = ["B.Tech in Computer Science", "M.Sc in Statistics", "B.E. in Electronics",
+           "MBA in Business Analytics", "PhD in Machine Learning"]
+SKILLS = ["python", "java", "c++", "sql", "pandas", "numpy", "tensorflow", "pytorch", "scikit-learn",
+          "machine learning", "deep learning", "react", "node", "aws", "azure", "docker", "kubernetes",
+          "excel", "nlp", "computer vision", "javascript", "html", "css", "spark", "airflow", "go"]
+FILLER = ("designed built shipped maintained scalable reliable services pipelines dashboards models "
+          "for customers stakeholders teams improving latency throughput cost accuracy by migrating "
+          "legacy systems to cloud infrastructure and mentoring junior engineers").split()
+
+
+def _sentence(rng, words=14):
+    return " ".join(rng.choice(FILLER) for _ in range(words)).capitalize() + "."
+
+
+def _pick_skills(rng, n, zipf):
+    # zipf=0: uniform; larger values make the first SKILLS entries more common
+    n = min(n, len(SKILLS))
+    if not zipf:
+        return rng.sample(SKILLS, n)
+    weights = [1 / (rank + 1) ** zipf for rank in range(len(SKILLS))]
+    picked = []
+    while len(picked) < n:
+        s = rng.choices(SKILLS, weights)[0]
+        if s not in picked:
+            picked.append(s)
+    return picked
+
+
+def resume_text(rng, n_skills=None, n_jobs=None, paragraphs_per_job=2, current_year=2026,
+                skill_range=(3, 12), job_range=(1, 5), job_years=(1, 5), skill_zipf=0.0):
+    # n_skills / n_jobs default to a draw from skill_range / job_range; each
+    # job lasts job_years years. Returns (text, skills, years)
+    n_skills = n_skills if n_skills is not None else rng.randint(*skill_range)
+    n_jobs = n_jobs if n_jobs is not None else rng.randint(*job_range)
+    skills = _pick_skills(rng, n_skills, skill_zipf)
+
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    handle = name.lower().replace(" ", ".")
+    lines = [
+        name,
+        f"{handle}@example.com",
+        f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        f"linkedin.com/in/{handle.replace('.', '-')}",
+        "Summary:",
+        _sentence(rng, 20),
+        "Skills:",
+        ", ".join(skills),
+        "Work Experience:",
+    ]
+
+    year = current_year - rng.randint(0, 2)
+    total = 0
+    for _ in range(n_jobs):
+        length = rng.randint(*job_years)
+        start = year - length
+        end = "present" if year >= current_year else str(year)
+        lines.append(f"{start} - {end}: {rng.choice(ROLES)} at {rng.choice(COMPANIES)}")
+        for _ in range(paragraphs_per_job):
+            lines.append(_sentence(rng))
+        total += length
+        year = start - rng.randint(0, 1)
+
+    lines += ["Projects:", _sentence(rng), "Education:", rng.choice(DEGREES)]
+    return "\n".join(lines), skills, total
+
+
+def corpus(n, seed=0, **kw):
+    rng = random.Random(seed)
+    return [resume_text(rng, **kw)[0] for _ in range(n)]
+
+
+# -------------------------------
+# FILES
+# -------------------------------
+def write_txt(path, text):
+    Path(path).write_text(text, encoding="utf-8")
+
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+
+def write_docx(path, text):
+    # minimal hand-written package (one paragraph per line); python-docx
+    # is an order of magnitude slower for large corpora
+    paragraphs = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in text.splitlines()
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragraphs}</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        z.writestr("_rels/.rels", _DOCX_RELS)
+        z.writestr("word/document.xml", document)
+
+
+def _pdf_escape(line):
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, text, lines_per_page=50):
+    # minimal hand-written PDF: Helvetica text, one content stream per page
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        body = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({_pdf_escape(l)}) '" for l in page_lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        data = obj if isinstance(obj, bytes) else obj.encode("latin-1")
+        out += b"%d 0 obj\n" % i + data + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(bytes(out))
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def generate_files(folder, n, formats=("txt",), seed=0, **kw):
+    # writes n resumes, formats in rotation; yields (path, skills, years)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(n):
+        fmt = formats[i % len(formats)]
+        text, skills, years = resume_text(rng, **kw)
+        path = folder / f"resume_{i:07d}.{fmt}"
+        WRITERS[fmt](path, text)
+        yield path, skills, years
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic resume corpus.")
+    parser.add_argument("folder")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--formats", nargs="+", default=["txt"], choices=sorted(WRITERS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skills", type=int, nargs=2, default=[3, 12], metavar=("MIN", "MAX"))
+    parser.add_argument("--skill-zipf", type=float, default=0.0, help="skill popularity skew (0 = uniform)")
+    parser.add_argument("--jobs", type=int, nargs=2, default=[1, 5], metavar=("MIN", "MAX"))
+    parser.add_argument("--job-years", type=int, nargs=2, default=[1, 5], metavar=("MIN", "MAX"))
+    parser.add_argument("--paragraphs", type=int, default=2, help="paragraphs per job")
+    args = parser.parse_args(argv)
+
+    count = 0
+    for _ in generate_files(args.folder, args.docs, tuple(args.formats), args.seed,
+                            skill_range=tuple(args.skills), skill_zipf=args.skill_zipf,
+                            job_range=tuple(args.jobs), job_years=tuple(args.job_years),
+                            paragraphs_per_job=args.paragraphs):
+        count += 1
+    print(f"Wrote {count} resumes to {args.folder}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from app.resume_parser import parse_resume_sections
+
+RESUME = """Jane Doe
+jane@example.com
+Experience:
+Senior Engineer, Acme (2018 - 2022)
+Responsibilities:
+Built the billing platform
+Achievements:
+Cut latency by 40%
+Education:
+B.Sc. Computer Science
+Hobbies:
+Chess
+"""
+
+
+def test_subheadings_stay_in_experience():
+    parsed = parse_resume_sections(RESUME)
+    assert parsed["experience"] == (
+        "Senior Engineer, Acme (2018 - 2022)\nResponsibilities:\nBuilt the billing platform\n"
+        "Achievements:\nCut latency by 40%"
+    )
+
+
+def test_generic_header_closes_other_sections():
+    assert parse_resume_sections(RESUME)["education"] == "B.Sc. Computer Science"
@@ -0,0 +1,32 @@
+import numpy as np
+
+from app.filters import ResumeFilter
+from app.metastore import MetaStore, write_metastore
+from app.search import _skill_overlap_scores
+from app.skills import canonical_skills
+
+
+def _store(tmp_path):
+    # skills are stored under their canonical names (see extract_skills)
+    write_metastore(tmp_path / "meta", [
+        (0, {"file": "a.pdf", "skills": ["kubernetes", "python"], "years_experience": 5}),
+        (1, {"file": "b.pdf", "skills": ["scikit-learn"], "years_experience": 2}),
+        (2, {"file": "c.pdf", "skills": ["java"], "years_experience": 8}),
+    ])
+    return MetaStore(tmp_path / "meta")
+
+
+def test_canonical_skills():
+    assert canonical_skills([" K8s", "kubernetes", "SKLearn", "", "Rust "]) == ["kubernetes", "scikit-learn", "rust"]
+
+
+def test_alias_query_scores(tmp_path):
+    metas = _store(tmp_path)
+    scores = _skill_overlap_scores(metas, np.arange(3), ["sklearn", "k8s"])
+    assert scores.tolist() == [0.5, 0.5, 0.0]
+
+
+def test_alias_filter(tmp_path):
+    metas = _store(tmp_path)
+    assert ResumeFilter(required_skills=["k8s"]).ids(metas).tolist() == [0]
+    assert ResumeFilter(required_skills=["Scikit Learn"]).ids(metas).tolist() == [1]